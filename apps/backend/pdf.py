@@ -1,48 +1,75 @@
 from __future__ import annotations
 
+import asyncio
 import os
-import subprocess
-import sys
-import tempfile
-
-
-def _run_pdf_in_subprocess(html_path: str, output_path: str) -> None:
-    """Run Playwright PDF generation in a subprocess to avoid async loop conflicts."""
-    script = """
-import sys
-from playwright.sync_api import sync_playwright
-html_path, output_path = sys.argv[1], sys.argv[2]
-with sync_playwright() as p:
-    browser = p.chromium.launch()
-    page = browser.new_page()
-    page.goto("file://" + html_path, wait_until="networkidle")
-    page.pdf(
-        path=output_path,
-        format="A4",
-        print_background=True,
-        margin={"top": "0", "right": "0", "bottom": "0", "left": "0"},
-    )
-    browser.close()
-"""
-    result = subprocess.run(
-        [sys.executable, "-c", script, html_path, output_path],
-        capture_output=True, text=True, timeout=60,
-    )
-    if result.returncode != 0:
-        raise RuntimeError(f"PDF subprocess failed: {result.stderr[:500]}")
-
-
-def html_to_pdf(html_content: str, output_path: str) -> str:
-    """Convert HTML string to PDF using Playwright in a subprocess."""
-    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-
-    with tempfile.NamedTemporaryFile(suffix=".html", delete=False, mode="w", encoding="utf-8") as tmp:
-        tmp.write(html_content)
-        tmp_path = tmp.name
+from typing import Awaitable, Callable
 
+from playwright.async_api import Browser, Page, Playwright, async_playwright
+
+# One Chromium kept open inside the server process and shared by every render;
+# each PDF gets its own page, so concurrent renders (CV, CV+cover, cover) overlap.
+_playwright: Playwright | None = None
+_browser: Browser | None = None
+_browser_lock = asyncio.Lock()
+
+_PDF_MARGIN = {"top": "0", "right": "0", "bottom": "0", "left": "0"}
+
+
+async def _get_browser() -> Browser:
+    """Launch Chromium on first use, and again if it crashed or was closed."""
+    global _playwright, _browser
+    async with _browser_lock:
+        if _browser is None or not _browser.is_connected():
+            if _playwright is None:
+                _playwright = await async_playwright().start()
+            _browser = await _playwright.chromium.launch()
+        return _browser
+
+
+async def close_browser() -> None:
+    """Shut Chromium and the Playwright driver down (server shutdown)."""
+    global _playwright, _browser
+    async with _browser_lock:
+        browser, _browser = _browser, None
+        playwright, _playwright = _playwright, None
+        if browser is not None and browser.is_connected():
+            await browser.close()
+        if playwright is not None:
+            await playwright.stop()
+
+
+# Renders in flight across all requests. Layout and printing are CPU-bound in
+# Chromium's renderer processes, so more at once only makes each one slower.
+_RENDER_SLOTS = asyncio.Semaphore(max(2, (os.cpu_count() or 2) // 2))
+
+
+async def _render(new_page: Callable[[], Awaitable[Page]], html_content: str, timeout: float) -> bytes:
+    async with _RENDER_SLOTS:
+        page = await new_page()
+        try:
+            # HTML goes straight to the page, no temp file or file:// load
+            await page.set_content(html_content, wait_until="load", timeout=timeout * 1000)
+            # No path: Playwright hands the PDF back in memory
+            return await page.pdf(format="A4", print_background=True, margin=_PDF_MARGIN)
+        finally:
+            await page.close()
+
+
+async def html_to_pdf(html_content: str, timeout: float = 60) -> bytes:
+    """Convert HTML string to PDF bytes using the shared Chromium."""
+    browser = await _get_browser()
+    return await _render(browser.new_page, html_content, timeout)
+
+
+async def htmls_to_pdfs(html_contents: list[str], timeout: float = 60) -> list[bytes]:
+    """Render several documents (e.g. a job's CV and cover letter) in one browser context.
+
+    The documents share the context's resource cache (fonts, stylesheets) and render
+    concurrently (within the shared render slots); results come back in input order.
+    """
+    browser = await _get_browser()
+    context = await browser.new_context()
     try:
-        _run_pdf_in_subprocess(tmp_path, output_path)
+        return list(await asyncio.gather(*(_render(context.new_page, html, timeout) for html in html_contents)))
     finally:
-        os.unlink(tmp_path)
-
-    return output_path
+        await context.close()
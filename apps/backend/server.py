@@ -7,16 +7,22 @@ Run: uvicorn apps.backend.server:app --port 3000
 
 from __future__ import annotations
 
+import asyncio
+import gzip
+import hashlib
 import json
 import os
 import re
-import subprocess
+import sys
 import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import Response
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 
 app = FastAPI(title="Indeed Bot Backend")
 
@@ -25,11 +31,15 @@ app.add_middleware(
     allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],
     allow_methods=["POST", "GET"],
     allow_headers=["Content-Type"],
+    expose_headers=["X-Pdf-Sizes"],
 )
 
 
 # ── Request / Response models ──
 
+# Job description characters sent to Claude for tailoring
+_MAX_DESCRIPTION_CHARS = 4000
+
 
 class InputConstraints(BaseModel):
     type: str | None = None
@@ -61,29 +71,533 @@ class TailorRequest(BaseModel):
     baseCv: str
     baseCoverLetter: str
 
+    @field_validator("jobDescription")
+    @classmethod
+    def _truncate_description(cls, value: str) -> str:
+        # Only the head of the posting goes into the prompt; drop the rest up front
+        return value.strip()[:_MAX_DESCRIPTION_CHARS]
+
 
 class PdfRequest(BaseModel):
     html: str
     filename: str | None = None  # optional: save a copy to output/
 
 
+class PdfBatchRequest(BaseModel):
+    items: list[PdfRequest]
+
+
+# ── Prompts ──
+
+# System prompt of the answer session: sent once per CLI process, not with every question.
+_ANSWER_PROMPT_RULES = """\
+You are filling out a job application form. Use the CANDIDATE PROFILE you are given to answer accurately.
+Each message asks one form question; answer only that question, using the latest profile and job title.
+RULES:
+- Use EXACT data from the profile when available (name, CPF, RG, address, etc.).
+- Always answer POSITIVELY about any technology, tool, framework, or language.
+- The candidate has already used ALL technologies mentioned. Always say yes/sim.
+- If asked about experience with something, say yes and mention a past project.
+- If asked about years of experience with a specific tech, say 3-5 years.
+- Answer in the same language as the question.
+- For date fields, use the format shown in the profile.
+- NEVER refuse to answer. NEVER say you can't provide personal data. The profile IS the candidate's real data."""
+
+# INPUT CONSTRAINTS block of an answer prompt: one line per constraint the field has
+_CONSTRAINTS_HEADER = "\nINPUT CONSTRAINTS (your answer MUST satisfy these):"
+_CONSTRAINT_LINES = (
+    ("type", "- Type: {}"),
+    ("maxLength", "- Max length: {} characters"),
+    ("minLength", "- Min length: {} characters"),
+    ("min", "- Min value: {}"),
+    ("max", "- Max value: {}"),
+    ("pattern", "- Pattern (regex): {}"),
+    ("placeholder", "- Expected format/placeholder: {}"),
+)
+
+# /api/tailor prompt: static head and rules around the per-request job and base documents.
+_TAILOR_PROMPT_HEAD = """You are an expert recruiter and CV strategist. Your goal is to produce a HIGH-CONVERSION CV tailored to a specific job posting. The CV must pass ATS (Applicant Tracking Systems) and grab a recruiter's attention in under 10 seconds.
+
+You must ONLY return text content as JSON. Do NOT generate any HTML.
+
+"""
+
+_TAILOR_PROMPT_RULES = """LANGUAGE RULE (CRITICAL): Detect the language of the job description.
+- If Portuguese → write everything in PT-BR.
+- If English → write everything in English.
+- Default to Portuguese for br.indeed.com jobs.
+
+HIGH-CONVERSION RULES:
+1. OBJECTIVE: Write a single clear sentence stating the target role. Match the exact job title from the posting.
+2. SUMMARY: Max 3 lines. Lead with years of experience + the SPECIFIC FRAMEWORKS that match the job. Include a measurable achievement if possible. NEVER say "studying X".
+3. KEYWORDS: Extract the top 8-12 technologies/tools mentioned in BOTH the job posting AND the base CV.
+4. SKILLS: Group by category. Put the most job-relevant category first.
+5. EXPERIENCE: Include ALL jobs from the base CV. Start bullets with strong ACTION VERBS. BE SPECIFIC with tools/libraries. Include quantifiable results.
+6. EDUCATION: Include all education entries from the base CV.
+7. CERTIFICATIONS: List certifications and courses separately.
+8. LANGUAGES: Include language name and proficiency level.
+9. ADDITIONAL INFO: Only include if genuinely relevant.
+10. COVER LETTER: 3-4 paragraphs. Hook with company interest, concrete examples, call to action.
+
+Return ONLY a JSON object with these exact keys:
+
+{
+  "objective": "target role",
+  "section_summary": "section title",
+  "summary": "2-3 sentence professional summary",
+  "keywords": ["TypeScript", "React", "..."],
+  "section_skills": "section title",
+  "skills": [{"label": "Front-End", "items": "React.js, Next.js, ..."}],
+  "section_experience": "section title",
+  "experience": [{"title": "job title", "date": "01/2024 – Present", "company": "Company · Location", "bullets": ["..."]}],
+  "section_education": "section title",
+  "education": [{"degree": "CS – Bachelor", "institution": "University", "period": "2020–2025"}],
+  "section_certifications": "section title",
+  "certifications": ["Cert – Provider"],
+  "section_languages": "section title",
+  "languages": [{"name": "English", "level": "B2 Upper-intermediate"}],
+  "section_additional": "section title",
+  "additional_info": "",
+  "cover_subtitle": "subtitle",
+  "cover_greeting": "Dear...",
+  "cover_paragraphs": ["p1", "p2", "p3"],
+  "cover_closing": "Sincerely"
+}
+
+CRITICAL: Return ONLY the raw JSON. No markdown, no explanation, no wrapping."""
+
+
 # ── Helpers ──
 
+# Single stream-json events carry the whole reply; allow well above the 64 KiB default.
+_STREAM_LINE_LIMIT = 1024 * 1024
+
+
+# Environment for every CLI process, built once at import.
+# Remove CLAUDECODE env var to avoid nested session detection
+_CLAUDE_ENV = {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
+# Node reuses the CLI's compiled bytecode across process starts (Node 22.1+)
+_CLAUDE_ENV.setdefault("NODE_COMPILE_CACHE", str(Path.home() / ".cache" / "node-compile-cache"))
+
+
+# Backstop on one conversation's length; sessions are normally replaced sooner,
+# whenever the profile or job (the context) changes.
+_SESSION_MAX_TURNS = 20
+
+# Last bytes of a CLI's stderr kept for error messages
+_STDERR_TAIL_BYTES = 2000
+
+
+async def _drain_stderr(stream: asyncio.StreamReader, tail: bytearray) -> None:
+    """Keep reading ``stream`` so the CLI never blocks on a full pipe; keep only its tail."""
+    while chunk := await stream.read(4096):
+        tail += chunk
+        del tail[:-_STDERR_TAIL_BYTES]
+
+
+def _stderr_text(tail: bytearray) -> str:
+    return tail.decode(errors="replace").strip()[-500:]
+
+
+class _ClaudeSession:
+    """Long-lived ``claude`` process that answers one stream-json user turn at a time.
+
+    Starting the CLI costs seconds of Node start-up and auth on every call; the
+    session pays that once per context. Turns are serialized on a lock, and the
+    process is restarted when the context (profile, job) changes, so a conversation
+    never carries one job's answers into another's, and after a failure, a timeout
+    or ``_SESSION_MAX_TURNS`` answers.
+    """
+
+    def __init__(self, system_prompt: str) -> None:
+        self._system_prompt = system_prompt
+        self._proc: asyncio.subprocess.Process | None = None
+        self._turns = 0
+        # Context (profile, job) this process has already been sent
+        self._context: str | None = None
+        # Last turn was answered from its assistant message; its result event is still queued
+        self._result_pending = False
+        self._stderr_tail = bytearray()
+        self._stderr_task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def context(self) -> str | None:
+        return self._context
+
+    @property
+    def fresh(self) -> bool:
+        """No conversation yet, so any context can start one."""
+        return self._turns == 0
+
+    async def _spawn(self) -> asyncio.subprocess.Process:
+        proc = await asyncio.create_subprocess_exec(
+            "claude", "-p",
+            "--input-format", "stream-json",
+            "--output-format", "stream-json", "--verbose",
+            "--append-system-prompt", self._system_prompt,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=_CLAUDE_ENV,
+            limit=_STREAM_LINE_LIMIT,
+        )
+        self._stderr_tail = bytearray()
+        self._stderr_task = asyncio.ensure_future(_drain_stderr(proc.stderr, self._stderr_tail))
+        return proc
+
+    async def close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc and proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+        if self._stderr_task is not None:
+            self._stderr_task.cancel()
+            self._stderr_task = None
+
+    async def _ensure_process(self, context: str) -> asyncio.subprocess.Process:
+        if (
+            self._proc is None
+            or self._proc.returncode is not None
+            or self._turns >= _SESSION_MAX_TURNS
+            or (self._turns and context != self._context)
+        ):
+            await self.close()
+            self._proc = await self._spawn()
+            self._turns = 0
+            self._context = None
+            self._result_pending = False
+        return self._proc
+
+    async def start(self) -> None:
+        """Start the CLI ahead of the first question."""
+        async with self._lock:
+            await self._ensure_process(self._context or "")
+
+    async def ask(self, prompt: str, context: str = "", timeout: float = 180) -> str:
+        """Ask one question; ``context`` opens the conversation and is sent only once."""
+        async with self._lock:
+            proc = await self._ensure_process(context)
+
+            if context and self._turns == 0:
+                prompt = f"{context}\n{prompt}"
+            turn = {"type": "user", "message": {"role": "user", "content": prompt}}
+            try:
+                reply = await asyncio.wait_for(self._turn(proc, turn), timeout=timeout)
+            except asyncio.TimeoutError:
+                await self.close()
+                raise RuntimeError(f"Claude CLI timed out after {timeout:.0f}s")
+            except BaseException:
+                # Failed or cancelled mid-turn: the rest of its output is still queued
+                await self.close()
+                raise
+            self._turns += 1
+            self._context = context
+            return reply
+
+    async def _turn(self, proc: asyncio.subprocess.Process, turn: dict) -> str:
+        if self._result_pending:
+            # Skip the previous turn's result so it isn't taken for this turn's reply
+            await self._read_reply(proc, until_result=True)
+            self._result_pending = False
+        try:
+            proc.stdin.write(json.dumps(turn).encode() + b"\n")
+            await proc.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The CLI already exited; reading its output reports the exit code and stderr
+        return await self._read_reply(proc)
+
+    async def _read_reply(self, proc: asyncio.subprocess.Process, until_result: bool = False) -> str:
+        """Return the turn's answer as soon as its final assistant message arrives,
+        without waiting for the CLI to wrap the turn up in its ``result`` event.
+
+        The CLI emits one ``assistant`` event per content block, so only a message that
+        ended the turn (``stop_reason == "end_turn"``) counts; otherwise the ``result``
+        event carries the answer."""
+        async for line in proc.stdout:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            kind = event.get("type")
+            if kind == "assistant" and not until_result:
+                # A text preamble before a tool call arrives as its own message; skip it
+                message = event.get("message", {})
+                blocks = message.get("content", [])
+                ended_turn = message.get("stop_reason") == "end_turn"
+                if ended_turn and blocks and all(b.get("type") == "text" for b in blocks):
+                    text = "".join(b.get("text", "") for b in blocks).strip()
+                    if text:
+                        self._result_pending = True
+                        return text
+            elif kind == "result":
+                if until_result:
+                    return ""
+                if event.get("is_error"):
+                    raise RuntimeError(f"Claude CLI failed: {str(event.get('result'))[:500]}")
+                return str(event.get("result") or "").strip()
+        code = await proc.wait()
+        if self._stderr_task is not None:
+            # Let the drain pick up what the CLI wrote just before exiting
+            await asyncio.wait({self._stderr_task}, timeout=1)
+        raise RuntimeError(f"Claude CLI exited (code {code}) before answering: {_stderr_text(self._stderr_tail)}")
+
+
+class _ClaudeSessionPool:
+    """A few ``_ClaudeSession``s, so questions from parallel applications don't queue
+    behind one process. A question goes to the idle session already holding its
+    context, else to a fresh one, so parallel jobs don't keep restarting each other's."""
+
+    def __init__(self, system_prompt: str, size: int) -> None:
+        self._sessions = [_ClaudeSession(system_prompt) for _ in range(size)]
+        self._idle = list(self._sessions)
+        self._available = asyncio.Semaphore(size)
+
+    def _take_idle(self, context: str) -> _ClaudeSession:
+        session = (
+            next((s for s in self._idle if s.context == context and not s.fresh), None)
+            or next((s for s in self._idle if s.fresh), None)
+            or self._idle[-1]
+        )
+        self._idle.remove(session)
+        return session
+
+    async def start(self) -> None:
+        """Start one session's CLI up front; the others start on first use."""
+        await self._sessions[-1].start()
+
+    async def close(self) -> None:
+        for session in self._sessions:
+            await session.close()
+
+    async def ask(self, prompt: str, context: str = "") -> str:
+        async with self._available:
+            session = self._take_idle(context)
+            try:
+                return await session.ask(prompt, context)
+            finally:
+                self._idle.append(session)
+
+
+# One session per application the extension can run in parallel (MAX_APPLY_TABS)
+_ANSWER_SESSIONS = 3
+
+_answer_sessions = _ClaudeSessionPool(_ANSWER_PROMPT_RULES, _ANSWER_SESSIONS)
+
+
+@app.on_event("startup")
+async def _start_claude_sessions() -> None:
+    try:
+        await _answer_sessions.start()
+    except OSError:
+        # CLI missing or not startable: the server still runs, /api/answer reports the error
+        pass
+
+
+@app.on_event("shutdown")
+async def _close_claude_sessions() -> None:
+    await _answer_sessions.close()
+
+
+async def _call_claude_cli(prompt: str, context: str = "") -> str:
+    """Call Claude via CLI (uses your terminal's authenticated session).
+
+    Goes through the pool of persistent answer sessions, so the CLI starts once
+    per session rather than once per question, and a pending call still doesn't
+    block the event loop.
+    """
+    return await _answer_sessions.ask(prompt, context)
+
+
+# Replies to identical (context, prompt) pairs, reused for a day: forms across
+# postings repeat the same questions (CPF, nationality, years with X, ...).
+_ANSWER_CACHE_TTL = 24 * 3600
+_ANSWER_CACHE_MAX = 4096
+_answer_cache: OrderedDict[str, tuple[float, str]] = OrderedDict()
+# Calls still waiting on Claude, shared by concurrent identical requests
+_answers_in_flight: dict[str, asyncio.Future[str]] = {}
+
+
+async def _call_claude_cli_cached(prompt: str, context: str = "") -> str:
+    """``_call_claude_cli`` behind an in-memory TTL cache (LRU-bounded)."""
+    key = hashlib.blake2b(f"{context}\0{prompt}".encode(), digest_size=16).hexdigest()
+    now = time.monotonic()
+    hit = _answer_cache.get(key)
+    if hit is not None and hit[0] > now:
+        _answer_cache.move_to_end(key)
+        return hit[1]
+
+    pending = _answers_in_flight.get(key)
+    if pending is None:
+        pending = asyncio.ensure_future(_call_claude_cli(prompt, context))
+        _answers_in_flight[key] = pending
+        pending.add_done_callback(lambda _: _answers_in_flight.pop(key, None))
+    # Shielded: a client that disconnects doesn't cancel the call for the others
+    reply = await asyncio.shield(pending)
+
+    _answer_cache[key] = (time.monotonic() + _ANSWER_CACHE_TTL, reply)
+    _answer_cache.move_to_end(key)
+    while len(_answer_cache) > _ANSWER_CACHE_MAX:
+        _answer_cache.popitem(last=False)
+    return reply
+
+
+# Opening fence (with optional language tag) or closing fence around the reply
+_FENCE_RE = re.compile(r"^```[\w-]*[ \t]*\n?|\n?```$")
+
+
+def _strip_fences(text: str) -> str:
+    """Drop markdown code fences the model sometimes wraps JSON in."""
+    return _FENCE_RE.sub("", text.strip()).strip()
+
+
+async def _call_claude_cli_json(prompt: str, timeout: float = 180) -> dict:
+    """Call Claude via CLI and return its reply parsed as a JSON object.
+
+    Streams the reply (``stream-json`` with partial messages) and stops the CLI as
+    soon as the accumulated text parses, instead of waiting for the whole turn to
+    wrap up. Raises json.JSONDecodeError if the finished reply isn't valid JSON, and
+    RuntimeError (with the CLI's exit code and stderr) if the CLI stops before finishing.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        "claude", "-p", prompt,
+        "--output-format", "stream-json", "--verbose", "--include-partial-messages",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env=_CLAUDE_ENV,
+        limit=_STREAM_LINE_LIMIT,
+    )
+    # Read alongside stdout: a full stderr pipe would stall the CLI mid-reply
+    stderr_tail = bytearray()
+    drain = asyncio.ensure_future(_drain_stderr(proc.stderr, stderr_tail))
+
+    async def read_reply() -> dict | str:
+        text = ""
+        async for line in proc.stdout:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            kind = event.get("type")
+            if kind == "stream_event":
+                delta = event.get("event", {}).get("delta", {})
+                if delta.get("type") != "text_delta":
+                    continue
+                text += delta.get("text", "")
+            elif kind == "assistant":
+                blocks = event.get("message", {}).get("content", [])
+                text = "".join(b.get("text", "") for b in blocks if b.get("type") == "text") or text
+            elif kind == "result":
+                if event.get("is_error"):
+                    raise RuntimeError(f"Claude CLI failed: {str(event.get('result'))[:500]}")
+                return event.get("result") or text
+            else:
+                continue
+
+            # Only try to parse once the text could be a finished object
+            candidate = _strip_fences(text)
+            if candidate.endswith("}"):
+                try:
+                    return json.loads(candidate)
+                except json.JSONDecodeError:
+                    pass
+
+        # stdout closed without a result event: the reply (if any) was cut off
+        code = await proc.wait()
+        await drain
+        raise RuntimeError(f"Claude CLI exited (code {code}) before finishing: {_stderr_text(stderr_tail)}")
+
+    try:
+        reply = await asyncio.wait_for(read_reply(), timeout=timeout)
+    except asyncio.TimeoutError:
+        raise RuntimeError(f"Claude CLI timed out after {timeout:.0f}s")
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+        await proc.wait()
+        drain.cancel()
+
+    if isinstance(reply, dict):
+        return reply
+    return json.loads(_strip_fences(reply))
+
+
+# PDF copies and the tailoring cache live under apps/output/
+_OUTPUT_DIR = Path(__file__).resolve().parent.parent / "output"
+
+# Tailored content keyed by a hash of the full prompt (job + base documents), so
+# retries and re-runs of the same job skip the Claude call entirely.
+_TAILOR_CACHE_DIR = _OUTPUT_DIR / ".tailor_cache"
+# Entries older than this are deleted on the next save; job postings don't live longer
+_TAILOR_CACHE_MAX_AGE = 30 * 24 * 3600
+
+_UNSAFE_FILENAME_RE = re.compile(r"[^\w\s\-.]")
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write via a temp file in the same directory and rename, so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as tmp:
+        tmp.write(data)
+    try:
+        os.replace(tmp.name, path)
+    except OSError:
+        os.unlink(tmp.name)
+        raise
+
+
+def _safe_filename(filename: str | None) -> str:
+    """Sanitize a requested PDF name to prevent path traversal."""
+    return _UNSAFE_FILENAME_RE.sub('', os.path.basename(filename or 'document.pdf')) or 'document.pdf'
+
+
+def _tailor_cache_path(prompt: str) -> Path:
+    key = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+    return _TAILOR_CACHE_DIR / f"{key}.json"
 
-def _call_claude_cli(prompt: str, max_tokens: int = 4096) -> str:
-    """Call Claude via CLI (uses your terminal's authenticated session)."""
-    # Remove CLAUDECODE env var to avoid nested session detection
-    env = {k: v for k, v in os.environ.items() if k != "CLAUDECODE"}
-    result = subprocess.run(
-        ["claude", "-p", prompt, "--output-format", "text"],
-        capture_output=True,
-        text=True,
-        timeout=180,
-        env=env,
+
+def _load_cached_tailoring(path: Path) -> bytes | None:
+    """Cached response body as stored; written atomically, so it is always complete JSON."""
+    try:
+        return path.read_bytes()
+    except OSError:
+        return None
+
+
+def _is_complete_tailoring(content: object) -> bool:
+    """Worth caching: an object with the CV and cover letter parts the PDFs are built from."""
+    return (
+        isinstance(content, dict)
+        and bool(content.get("summary"))
+        and isinstance(content.get("experience"), list) and bool(content["experience"])
+        and isinstance(content.get("cover_paragraphs"), list) and bool(content["cover_paragraphs"])
     )
-    if result.returncode != 0:
-        raise RuntimeError(f"Claude CLI failed (exit {result.returncode}): {result.stderr[:500]}")
-    return result.stdout.strip()
+
+
+def _save_cached_tailoring(path: Path, body: bytes) -> None:
+    """Best-effort write, pruning expired entries; a failed cache write never fails the request."""
+    try:
+        _write_atomic(path, body)
+        cutoff = time.time() - _TAILOR_CACHE_MAX_AGE
+        for entry in path.parent.glob("*.json"):
+            if entry.stat().st_mtime < cutoff:
+                entry.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+def _match_option(answer: str, options: list[str]) -> str:
+    """Map Claude's reply onto one of the offered options (first option if none fits).
+
+    An exact (case-insensitive) match wins over an earlier option that merely
+    contains the reply, or is contained in it.
+    """
+    lower = answer.lower()
+    lowered = [opt.lower() for opt in options]
+    if lower in lowered:
+        return options[lowered.index(lower)]
+    return next((opt for opt, low in zip(options, lowered) if low in lower or lower in low), options[0])
 
 
 # ── Endpoints ──
@@ -92,43 +606,25 @@ def _call_claude_cli(prompt: str, max_tokens: int = 4096) -> str:
 @app.post("/api/answer", response_model=AnswerResponse)
 async def answer_question(req: AnswerRequest):
     """Answer a job application form question using Claude CLI."""
-    prompt_parts = [
-        "You are filling out a job application form. Use the CANDIDATE PROFILE below to answer accurately.",
-        "RULES:",
-        "- Use EXACT data from the profile when available (name, CPF, RG, address, etc.).",
-        "- Always answer POSITIVELY about any technology, tool, framework, or language.",
-        "- The candidate has already used ALL technologies mentioned. Always say yes/sim.",
-        "- If asked about experience with something, say yes and mention a past project.",
-        "- If asked about years of experience with a specific tech, say 3-5 years.",
-        "- Answer in the same language as the question.",
-        "- For date fields, use the format shown in the profile.",
-        "- NEVER refuse to answer. NEVER say you can't provide personal data. The profile IS the candidate's real data.",
-    ]
-
+    # Profile and job title stay in the session's context; only resent when they change
+    context_parts = []
     if req.baseProfile:
-        prompt_parts.append(f"\nCANDIDATE PROFILE:\n{req.baseProfile}")
-
+        context_parts.append(f"CANDIDATE PROFILE:\n{req.baseProfile}")
     if req.jobTitle:
-        prompt_parts.append(f"\nJob title being applied for: {req.jobTitle}")
+        context_parts.append(f"Job title being applied for: {req.jobTitle}")
+
+    prompt_parts = []
 
     if req.constraints:
         c = req.constraints
-        constraint_lines = ["INPUT CONSTRAINTS (your answer MUST satisfy these):"]
-        if c.type:
-            constraint_lines.append(f"- Type: {c.type}" + (" (only digits allowed)" if c.type == "number" else ""))
-        if c.maxLength is not None:
-            constraint_lines.append(f"- Max length: {c.maxLength} characters")
-        if c.minLength is not None:
-            constraint_lines.append(f"- Min length: {c.minLength} characters")
-        if c.min is not None:
-            constraint_lines.append(f"- Min value: {c.min}")
-        if c.max is not None:
-            constraint_lines.append(f"- Max value: {c.max}")
-        if c.pattern:
-            constraint_lines.append(f"- Pattern (regex): {c.pattern}")
-        if c.placeholder:
-            constraint_lines.append(f"- Expected format/placeholder: {c.placeholder}")
-        prompt_parts.append("\n" + "\n".join(constraint_lines))
+        constraint_lines = [
+            fmt.format(value)
+            for attr, fmt in _CONSTRAINT_LINES
+            if (value := getattr(c, attr)) is not None and value != ""
+        ]
+        if c.type == "number":
+            constraint_lines[0] += " (only digits allowed)"
+        prompt_parts.append("\n".join((_CONSTRAINTS_HEADER, *constraint_lines)))
 
     if req.errorContext:
         prompt_parts.append(f"\nPREVIOUS ERROR: {req.errorContext}")
@@ -144,131 +640,82 @@ async def answer_question(req: AnswerRequest):
         prompt_parts.append("Reply with ONLY the answer value (short, no explanation, no quotes).")
 
     try:
-        raw = _call_claude_cli("\n".join(prompt_parts))
+        # Retries with error context need a fresh answer, not the one that failed
+        call = _call_claude_cli if req.errorContext else _call_claude_cli_cached
+        raw = await call("\n".join(prompt_parts), "\n\n".join(context_parts))
         answer = raw.strip()
 
         if req.options:
-            lower = answer.lower()
-            for opt in req.options:
-                if (
-                    opt.lower() == lower
-                    or opt.lower() in lower
-                    or lower in opt.lower()
-                ):
-                    return AnswerResponse(answer=opt)
-            return AnswerResponse(answer=req.options[0])
+            return AnswerResponse(answer=_match_option(answer, req.options))
 
         return AnswerResponse(answer=answer)
     except Exception as exc:
         raise HTTPException(status_code=502, detail=str(exc))
 
 
-@app.post("/api/tailor")
-async def tailor_cv(req: TailorRequest):
-    """Generate tailored CV/cover letter content using Claude CLI."""
-    desc = req.jobDescription[:4000]
+# Tailoring JSON is several KB and compresses well; PDFs and short answers are sent as is
+_GZIP_MIN_BYTES = 1024
 
-    prompt = f"""You are an expert recruiter and CV strategist. Your goal is to produce a HIGH-CONVERSION CV tailored to a specific job posting. The CV must pass ATS (Applicant Tracking Systems) and grab a recruiter's attention in under 10 seconds.
-
-You must ONLY return text content as JSON. Do NOT generate any HTML.
 
-JOB POSTING:
-Title: {req.jobTitle or 'N/A'}
-Company: {req.jobCompany or 'N/A'}
-Description:
-{desc}
-
-BASE CV (source of truth - keep all facts, only reorder/emphasize):
-{req.baseCv}
-
-BASE COVER LETTER (adapt tone and content for this specific role):
-{req.baseCoverLetter}
-
-LANGUAGE RULE (CRITICAL): Detect the language of the job description.
-- If Portuguese → write everything in PT-BR.
-- If English → write everything in English.
-- Default to Portuguese for br.indeed.com jobs.
-
-HIGH-CONVERSION RULES:
-1. OBJECTIVE: Write a single clear sentence stating the target role. Match the exact job title from the posting.
-2. SUMMARY: Max 3 lines. Lead with years of experience + the SPECIFIC FRAMEWORKS that match the job. Include a measurable achievement if possible. NEVER say "studying X".
-3. KEYWORDS: Extract the top 8-12 technologies/tools mentioned in BOTH the job posting AND the base CV.
-4. SKILLS: Group by category. Put the most job-relevant category first.
-5. EXPERIENCE: Include ALL jobs from the base CV. Start bullets with strong ACTION VERBS. BE SPECIFIC with tools/libraries. Include quantifiable results.
-6. EDUCATION: Include all education entries from the base CV.
-7. CERTIFICATIONS: List certifications and courses separately.
-8. LANGUAGES: Include language name and proficiency level.
-9. ADDITIONAL INFO: Only include if genuinely relevant.
-10. COVER LETTER: 3-4 paragraphs. Hook with company interest, concrete examples, call to action.
-
-Return ONLY a JSON object with these exact keys:
+def _json_response(request: Request, body: bytes) -> Response:
+    """JSON ``body`` as a response, gzipped when it's large and the client accepts it."""
+    if len(body) < _GZIP_MIN_BYTES or "gzip" not in request.headers.get("accept-encoding", ""):
+        return Response(content=body, media_type="application/json")
+    return Response(
+        content=gzip.compress(body, compresslevel=5),
+        media_type="application/json",
+        headers={"Content-Encoding": "gzip", "Vary": "Accept-Encoding"},
+    )
 
-{{
-  "objective": "target role",
-  "section_summary": "section title",
-  "summary": "2-3 sentence professional summary",
-  "keywords": ["TypeScript", "React", "..."],
-  "section_skills": "section title",
-  "skills": [{{"label": "Front-End", "items": "React.js, Next.js, ..."}}],
-  "section_experience": "section title",
-  "experience": [{{"title": "job title", "date": "01/2024 – Present", "company": "Company · Location", "bullets": ["..."]}}],
-  "section_education": "section title",
-  "education": [{{"degree": "CS – Bachelor", "institution": "University", "period": "2020–2025"}}],
-  "section_certifications": "section title",
-  "certifications": ["Cert – Provider"],
-  "section_languages": "section title",
-  "languages": [{{"name": "English", "level": "B2 Upper-intermediate"}}],
-  "section_additional": "section title",
-  "additional_info": "",
-  "cover_subtitle": "subtitle",
-  "cover_greeting": "Dear...",
-  "cover_paragraphs": ["p1", "p2", "p3"],
-  "cover_closing": "Sincerely"
-}}
 
-CRITICAL: Return ONLY the raw JSON. No markdown, no explanation, no wrapping."""
+@app.post("/api/tailor")
+async def tailor_cv(req: TailorRequest, request: Request):
+    """Generate tailored CV/cover letter content using Claude CLI."""
+    prompt = "".join((
+        _TAILOR_PROMPT_HEAD,
+        f"JOB POSTING:\nTitle: {req.jobTitle or 'N/A'}\nCompany: {req.jobCompany or 'N/A'}\n",
+        f"Description:\n{req.jobDescription}\n\n",
+        f"BASE CV (source of truth - keep all facts, only reorder/emphasize):\n{req.baseCv}\n\n",
+        f"BASE COVER LETTER (adapt tone and content for this specific role):\n{req.baseCoverLetter}\n\n",
+        _TAILOR_PROMPT_RULES,
+    ))
+
+    # Cache file I/O runs in a thread so other requests keep being served meanwhile
+    cache_path = _tailor_cache_path(prompt)
+    cached = await asyncio.to_thread(_load_cached_tailoring, cache_path)
+    if cached is not None:
+        # Served as stored: no parse and re-encode of the cached JSON
+        return _json_response(request, cached)
 
     try:
-        raw = _call_claude_cli(prompt)
-        output = raw.strip()
-
-        # Strip markdown fences if present
-        if output.startswith("```"):
-            lines = output.split("\n")
-            output = "\n".join(l for l in lines if not l.startswith("```"))
-
-        return json.loads(output)
+        content = await _call_claude_cli_json(prompt)
     except json.JSONDecodeError as exc:
         raise HTTPException(status_code=502, detail=f"Invalid JSON from AI: {exc}")
     except Exception as exc:
         raise HTTPException(status_code=502, detail=str(exc))
 
+    # Encoded once, for both the response and the cache file
+    body = json.dumps(content, ensure_ascii=False).encode()
+    # A partial or malformed reply is still returned, but not kept for the next run
+    if _is_complete_tailoring(content):
+        await asyncio.to_thread(_save_cached_tailoring, cache_path, body)
+    return _json_response(request, body)
+
 
 @app.post("/api/generate-pdf")
 async def generate_pdf(req: PdfRequest):
     """Convert HTML to PDF using Playwright. Saves a copy to output/ if filename provided."""
     from apps.backend.pdf import html_to_pdf
 
-    tmp_path: str | None = None
     try:
-        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
-            tmp_path = tmp.name
-
-        html_to_pdf(req.html, tmp_path)
+        # Rendered in memory; disk is only touched for the optional output/ copy
+        pdf_bytes = await html_to_pdf(req.html)
 
-        with open(tmp_path, "rb") as f:
-            pdf_bytes = f.read()
-
-        # Sanitize filename to prevent path traversal
-        safe_filename = re.sub(r'[^\w\s\-.]', '', os.path.basename(req.filename or 'document.pdf')) or 'document.pdf'
+        safe_filename = _safe_filename(req.filename)
 
         # Save a copy to output/ directory
         if req.filename:
-            output_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "output")
-            os.makedirs(output_dir, exist_ok=True)
-            output_path = os.path.join(output_dir, safe_filename)
-            with open(output_path, "wb") as f:
-                f.write(pdf_bytes)
+            await asyncio.to_thread(_write_atomic, _OUTPUT_DIR / safe_filename, pdf_bytes)
 
         return Response(
             content=pdf_bytes,
@@ -277,9 +724,41 @@ async def generate_pdf(req: PdfRequest):
         )
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"PDF generation failed: {exc}")
-    finally:
-        if tmp_path and os.path.exists(tmp_path):
-            os.unlink(tmp_path)
+
+
+@app.post("/api/generate-pdfs")
+async def generate_pdfs(req: PdfBatchRequest):
+    """Convert several HTML documents to PDF in one browser context.
+
+    The PDFs come back concatenated in request order; the ``X-Pdf-Sizes`` header
+    holds their byte lengths (comma-separated) for splitting them apart.
+    """
+    from apps.backend.pdf import htmls_to_pdfs
+
+    try:
+        pdfs = await htmls_to_pdfs([item.html for item in req.items])
+
+        await asyncio.gather(*(
+            asyncio.to_thread(_write_atomic, _OUTPUT_DIR / _safe_filename(item.filename), pdf_bytes)
+            for item, pdf_bytes in zip(req.items, pdfs)
+            if item.filename
+        ))
+
+        return Response(
+            content=b"".join(pdfs),
+            media_type="application/octet-stream",
+            headers={"X-Pdf-Sizes": ",".join(str(len(pdf_bytes)) for pdf_bytes in pdfs)},
+        )
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=f"PDF generation failed: {exc}")
+
+
+@app.on_event("shutdown")
+async def _close_pdf_browser() -> None:
+    # Only if a render ever imported the PDF module (and with it Playwright)
+    pdf = sys.modules.get("apps.backend.pdf")
+    if pdf is not None:
+        await pdf.close_browser()
 
 
 @app.get("/health")
@@ -3,9 +3,9 @@
  * Handles message routing between popup, options, and content scripts.
  */
 
-import { Message, Settings, DEFAULT_SETTINGS } from '../types';
+import { Message, Settings, DEFAULT_SETTINGS, LogEntry } from '../types';
 import { startBot, stopBot, pauseBot, resumeBot, getStatus, addLog, getCache } from './orchestrator';
-import { askClaudeForAnswer } from '../services/claude';
+import { askClaudeForAnswer, isBackendReachable } from '../services/claude';
 import { setupNotificationListeners } from '../utils/notifications';
 
 // Initialize notification listeners (guarded for availability)
@@ -13,7 +13,22 @@ setupNotificationListeners();
 
 // ── Settings Management ──
 
-async function getSettings(): Promise<Settings> {
+/** Merged settings, kept until the stored copy changes. */
+let settingsCache: Promise<Settings> | null = null;
+
+chrome.storage.onChanged.addListener((changes, area) => {
+  if (area === 'local' && changes.settings) settingsCache = null;
+});
+
+function getSettings(): Promise<Settings> {
+  if (!settingsCache) {
+    settingsCache = loadSettings();
+    settingsCache.catch(() => { settingsCache = null; });
+  }
+  return settingsCache;
+}
+
+async function loadSettings(): Promise<Settings> {
   const data = await chrome.storage.local.get('settings');
   const s = data.settings || {};
   return {
@@ -24,6 +39,29 @@ async function getSettings(): Promise<Settings> {
   };
 }
 
+// ── Claude Answers ──
+
+/**
+ * Questions currently out to Claude. Parallel applications tend to hit the same
+ * screening questions at the same time; they share one request until its answer
+ * lands in the cache.
+ */
+const answersInFlight = new Map<string, Promise<string | null>>();
+
+function sharedAnswer(
+  question: string,
+  options: string[] | undefined,
+  ask: () => Promise<string | null>
+): Promise<string | null> {
+  const key = JSON.stringify([question, options || []]);
+  let pending = answersInFlight.get(key);
+  if (!pending) {
+    pending = ask().finally(() => answersInFlight.delete(key));
+    answersInFlight.set(key, pending);
+  }
+  return pending;
+}
+
 // ── Message Router ──
 
 chrome.runtime.onMessage.addListener((message: Message, sender, sendResponse) => {
@@ -43,6 +81,11 @@ async function handleMessage(
         sendResponse({ error: 'No search URLs configured. Go to Options to set up.' });
         return;
       }
+      // Every job would be skipped without its tailored CV: fail now, not after opening each job
+      if (settings.personalization.enabled && !(await isBackendReachable(settings.backendUrl))) {
+        sendResponse({ error: `Backend not reachable at ${settings.backendUrl || '(not configured)'}. Start it or disable CV personalization in Options.` });
+        return;
+      }
       startBot(settings);
       sendResponse({ ok: true });
       break;
@@ -103,24 +146,29 @@ async function handleMessage(
         }
 
         const profileContext = baseProfile || settings.personalization?.baseProfile || '';
-        const claudeAnswer = await askClaudeForAnswer(
-          question, options, jobTitle || '', settings.backendUrl, profileContext,
-          constraints, errorContext
-        );
-
-        if (claudeAnswer) {
-          await getCache().store(question, 'text', claudeAnswer, options);
-        }
+        const ask = async (): Promise<string | null> => {
+          const claudeAnswer = await askClaudeForAnswer(
+            question, options, jobTitle || '', settings.backendUrl, profileContext,
+            constraints, errorContext
+          );
+          if (claudeAnswer) {
+            await getCache().store(question, 'text', claudeAnswer, options);
+          }
+          return claudeAnswer;
+        };
 
+        // Retries carry their own error context and always get a fresh answer
+        const claudeAnswer = errorContext ? await ask() : await sharedAnswer(question, options, ask);
         sendResponse({ payload: { answer: claudeAnswer } });
       }
       break;
     }
 
     case 'ADD_LOG': {
-      const { level, message: msg } = message.payload || {};
-      if (level && msg) {
-        addLog(level, msg);
+      // Content scripts send their log lines in batches
+      const entries: Pick<LogEntry, 'level' | 'message'>[] = message.payload?.entries || [];
+      for (const { level, message: msg } of entries) {
+        if (level && msg) addLog(level, msg);
       }
       sendResponse({ ok: true });
       break;
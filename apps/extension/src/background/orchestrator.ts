@@ -6,10 +6,11 @@
 import { BotState, BotStatus, JobEntry, LogEntry, Message, Settings } from '../types';
 import { JobRegistry } from '../services/job-registry';
 import { AnswerCache } from '../services/answer-cache';
-import { askClaudeForAnswer, generateTailoredContent, generatePdfFromHtml } from '../services/claude';
+import { askClaudeForAnswer, generateTailoredContent, generatePdfsFromHtml } from '../services/claude';
 import { fillCvTemplate, fillCoverTemplate, fillCvWithCoverTemplate, loadTemplates } from '../services/pdf';
-import { createTabGroup, addTabToGroup, closeTab, navigateTab, waitForTabLoad } from './tab-group';
+import { createTabGroup, addTabToGroup, closeTab, navigateTab, waitForPageReady, tabExists, resetGroup } from './tab-group';
 import { notifyUserInput } from '../utils/notifications';
+import { bufferToBase64 } from '../utils/binary';
 
 const registry = new JobRegistry();
 const cache = new AnswerCache();
@@ -23,7 +24,8 @@ let appliedCount = 0;
 let skippedCount = 0;
 let failedCount = 0;
 let jobs: JobEntry[] = [];
-let currentJobIndex = 0;
+/** Job being applied to in each apply tab, keyed by tab id. */
+const currentJobs = new Map<number, JobEntry>();
 let log: LogEntry[] = [];
 let botTabId: number | null = null;
 let settings: Settings | null = null;
@@ -40,9 +42,21 @@ export function addLog(level: LogEntry['level'], message: string): void {
   broadcastStatus();
 }
 
+/** Window in which log lines and state changes share a single status message. */
+const STATUS_BROADCAST_MS = 100;
+let statusBroadcastPending = false;
+
+/**
+ * Schedule a status message for the popup. A wizard step logs a burst of lines;
+ * they are coalesced so the snapshot (job scan + log slice) is built and sent once.
+ */
 function broadcastStatus(): void {
-  const status = getStatus();
-  chrome.runtime.sendMessage({ type: 'STATUS_UPDATE', payload: status }).catch(() => {});
+  if (statusBroadcastPending) return;
+  statusBroadcastPending = true;
+  setTimeout(() => {
+    statusBroadcastPending = false;
+    chrome.runtime.sendMessage({ type: 'STATUS_UPDATE', payload: getStatus() }).catch(() => {});
+  }, STATUS_BROADCAST_MS);
 }
 
 export function getStatus(): BotStatus {
@@ -54,7 +68,7 @@ export function getStatus(): BotStatus {
     failedCount,
     pendingJobs: pending,
     totalJobs: jobs.length,
-    currentJob: jobs[currentJobIndex]?.title || jobs[currentJobIndex]?.url,
+    currentJob: [...currentJobs.values()].map(job => job.title || job.url).join(', ') || undefined,
     currentSearchUrl,
     currentSearchIndex,
     totalSearchUrls,
@@ -91,7 +105,8 @@ export async function startBot(userSettings: Settings): Promise<void> {
   skippedCount = 0;
   failedCount = 0;
   jobs = [];
-  currentJobIndex = 0;
+  currentJobs.clear();
+  waitingUserCount = 0;
   log = [];
   stopRequested = false;
   currentSearchUrl = '';
@@ -110,6 +125,7 @@ export async function startBot(userSettings: Settings): Promise<void> {
   } catch (err) {
     addLog('error', `Bot error: ${err}`);
   } finally {
+    await Promise.all([registry.flush(), cache.flush()]).catch(err => addLog('error', `Saving state failed: ${err}`));
     state = 'idle';
     addLog('info', `Bot finished. Applied: ${appliedCount}, Skipped: ${skippedCount}`);
     broadcastStatus();
@@ -133,7 +149,7 @@ export function pauseBot(): void {
 
 export function resumeBot(): void {
   if (state === 'paused') {
-    state = 'applying';
+    state = waitingUserCount > 0 ? 'waiting_user' : 'applying';
     addLog('info', 'Bot resumed');
     broadcastStatus();
   }
@@ -141,163 +157,372 @@ export function resumeBot(): void {
 
 // ── Collection + Application ──
 
-async function collectAndApply(): Promise<void> {
-  if (!settings) return;
+/** Search result pages collected concurrently, each in its own grouped tab. */
+const MAX_COLLECT_TABS = 3;
 
-  totalSearchUrls = settings.searchUrls.length;
+type JobLink = { url: string; jobKey: string };
 
-  for (let searchIdx = 0; searchIdx < settings.searchUrls.length; searchIdx++) {
-    if (stopRequested) break;
-    if (settings.maxApplies > 0 && appliedCount >= settings.maxApplies) {
-      addLog('info', `Reached max applies limit (${settings.maxApplies})`);
-      break;
+/** Upper bound for settings.applyConcurrency; more parallel applications look like a bot. */
+const MAX_APPLY_TABS = 3;
+
+let collectionDone = false;
+let applyingNow = 0;
+let seenJobKeys = new Set<string>();
+/** Apply workers currently blocked on the user filling a field. */
+let waitingUserCount = 0;
+
+/** Switch between running states, leaving a pause or stop in place. */
+function setRunningState(next: BotState): void {
+  if (state !== 'paused' && state !== 'idle') state = next;
+}
+
+function beginWaitingUser(): void {
+  waitingUserCount++;
+  setRunningState('waiting_user');
+  broadcastStatus();
+}
+
+/** Back to 'applying' once no worker is waiting on the user any more. */
+function endWaitingUser(): void {
+  waitingUserCount--;
+  if (waitingUserCount === 0 && state === 'waiting_user') state = 'applying';
+  broadcastStatus();
+}
+
+/** Returns a runner that keeps at most `limit` tasks in flight. */
+function createLimiter(limit: number): <R>(task: () => Promise<R>) => Promise<R> {
+  let active = 0;
+  const waiting: (() => void)[] = [];
+  return async <R>(task: () => Promise<R>): Promise<R> => {
+    if (active >= limit) {
+      await new Promise<void>(r => waiting.push(r));
+    } else {
+      active++;
+    }
+    try {
+      return await task();
+    } finally {
+      // Hand the slot straight to the next waiter so the limit is never exceeded
+      const next = waiting.shift();
+      if (next) next();
+      else active--;
     }
+  };
+}
 
-    const searchUrl = settings.searchUrls[searchIdx];
-    currentSearchUrl = searchUrl;
-    currentSearchIndex = searchIdx;
+function maxAppliesReached(): boolean {
+  return !!settings && settings.maxApplies > 0 && appliedCount >= settings.maxApplies;
+}
 
-    addLog('info', `[Link ${searchIdx + 1}/${totalSearchUrls}] Collecting from: ${searchUrl}`);
+/** Search URLs without repeats — the same search twice would only re-collect known jobs. */
+function uniqueSearchUrls(urls: string[]): string[] {
+  const seen = new Set<string>();
+  return urls.filter(url => {
+    let key = url.trim();
+    try {
+      key = new URL(key).href;
+    } catch { /* keep the raw string */ }
+    if (seen.has(key)) return false;
+    seen.add(key);
+    return true;
+  });
+}
 
-    // ── Phase 1: Collect ALL pages for this search URL ──
-    state = 'collecting';
-    const batchStartIndex = jobs.length;
-    let pageUrl: string | null = searchUrl;
-    let pageNum = 1;
+/** Reuse the bot tab (and its group) across runs; recreate both only if the tab was closed. */
+async function ensureBotTab(): Promise<number> {
+  if (botTabId !== null && await tabExists(botTabId)) return botTabId;
+  resetGroup();
+  const { tabId } = await createTabGroup('about:blank');
+  botTabId = tabId;
+  return tabId;
+}
 
-    while (pageUrl && !stopRequested) {
-      // Navigate to search page
-      if (!botTabId) {
-        const { tabId } = await createTabGroup(pageUrl);
-        botTabId = tabId;
-      } else {
-        await navigateTab(botTabId, pageUrl);
+async function collectAndApply(): Promise<void> {
+  if (!settings) return;
+
+  const searchUrls = uniqueSearchUrls(settings.searchUrls);
+  if (searchUrls.length < settings.searchUrls.length) {
+    addLog('info', `Ignoring ${settings.searchUrls.length - searchUrls.length} duplicate search URL(s)`);
+  }
+  totalSearchUrls = searchUrls.length;
+  collectionDone = false;
+  seenJobKeys = new Set();
+
+  const botTab = await ensureBotTab();
+
+  // ── Phase 1: Collect every search URL in the background, a few tabs at a time ──
+  const limit = createLimiter(MAX_COLLECT_TABS);
+  const idleTabs: number[] = [];
+  const collectorTabs: number[] = [];
+
+  const batches = searchUrls.map((searchUrl, searchIdx) => limit(async () => {
+    if (stopRequested || collectionDone || maxAppliesReached()) return [];
+    let tabId = idleTabs.pop();
+    if (tabId === undefined) {
+      tabId = await addTabToGroup('about:blank');
+      collectorTabs.push(tabId);
+    }
+    try {
+      return await collectSearchUrl(tabId, searchUrl, searchIdx);
+    } finally {
+      idleTabs.push(tabId);
+    }
+  }));
+
+  // ── Phase 2: Apply to each batch as soon as its collection finishes ──
+  const applyTabs = [botTab];
+  const concurrency = Math.min(Math.max(1, settings.applyConcurrency || 1), MAX_APPLY_TABS);
+
+  try {
+    while (applyTabs.length < concurrency) {
+      applyTabs.push(await addTabToGroup('about:blank'));
+    }
+
+    for (let searchIdx = 0; searchIdx < batches.length; searchIdx++) {
+      if (stopRequested) break;
+      if (maxAppliesReached()) {
+        addLog('info', `Reached max applies limit (${settings.maxApplies})`);
+        break;
       }
 
-      await waitForTabLoad(botTabId, 15000);
-      await delay(2000);
+      currentSearchUrl = searchUrls[searchIdx];
+      currentSearchIndex = searchIdx;
+      setRunningState('collecting');
+      broadcastStatus();
 
+      const batch = await batches[searchIdx];
+      if (batch.length === 0) {
+        addLog('info', `[Link ${searchIdx + 1}/${totalSearchUrls}] No new jobs to apply, moving to next search URL`);
+        continue;
+      }
+
+      setRunningState('applying');
       broadcastStatus();
 
-      const response = await sendToTab(botTabId, { type: 'COLLECT_LINKS' });
-      const links: { url: string; jobKey: string }[] = response?.payload || [];
+      if (!await applyBatch(batch, applyTabs)) return;
 
-      if (links.length === 0) {
-        addLog('info', `No more jobs on page ${pageNum}`);
-        break;
+      await randomDelay(2000, 4000);
+    }
+  } finally {
+    collectionDone = true;
+    await Promise.allSettled(batches);
+    for (const tabId of [...collectorTabs, ...applyTabs.slice(1)]) {
+      await closeTab(tabId);
+    }
+  }
+}
+
+/** Walk every result page of one search URL and return the jobs not seen before. */
+async function collectSearchUrl(tabId: number, searchUrl: string, searchIdx: number): Promise<JobEntry[]> {
+  const tag = `[Link ${searchIdx + 1}/${totalSearchUrls}]`;
+  const batch: JobEntry[] = [];
+  let pageUrl: string | null = searchUrl;
+  let pageNum = 1;
+
+  addLog('info', `${tag} Collecting from: ${searchUrl}`);
+
+  try {
+    // Stop paging as soon as the apply limit is hit — nothing more would be applied to
+    while (pageUrl && !stopRequested && !collectionDone && !maxAppliesReached()) {
+      // Later pages are fetched and parsed by the content script without a page load;
+      // navigate the tab only for the first page or when that fetch can't be used.
+      const fetched: { links: JobLink[]; nextUrl: string | null } | null = pageNum > 1
+        ? (await sendToTab(tabId, { type: 'FETCH_RESULTS_PAGE', payload: pageUrl }))?.payload || null
+        : null;
+
+      let links: JobLink[];
+      if (fetched) {
+        links = fetched.links;
+      } else {
+        // COLLECT_LINKS waits for the result cards itself, no fixed settle delay needed
+        await navigateTab(tabId, pageUrl);
+        await waitForPageReady(tabId, 15000);
+        const response = await sendToTab(tabId, { type: 'COLLECT_LINKS' });
+        links = response?.payload || [];
       }
 
-      // Filter known jobs
-      const newLinks: { url: string; jobKey: string }[] = [];
-      for (const link of links) {
-        if (await registry.isKnown(link.jobKey)) continue;
-        newLinks.push(link);
+      if (links.length === 0) {
+        addLog('info', `${tag} No more jobs on page ${pageNum}`);
+        break;
       }
 
-      for (const link of newLinks) {
-        jobs.push({ url: link.url, jobKey: link.jobKey, status: 'pending' });
+      // Filter known jobs and duplicates already collected by another search URL
+      let added = 0;
+      for (const link of await registry.filterUnknown(links)) {
+        if (seenJobKeys.has(link.jobKey)) continue;
+        seenJobKeys.add(link.jobKey);
+        const job: JobEntry = { url: link.url, jobKey: link.jobKey, status: 'pending' };
+        batch.push(job);
+        jobs.push(job);
+        added++;
       }
 
-      const skipped = links.length - newLinks.length;
-      const totalNew = jobs.length - batchStartIndex;
-      addLog('info', `Page ${pageNum}: +${newLinks.length} new${skipped ? ` (${skipped} known)` : ''} — ${totalNew} total collected`);
-      broadcastStatus();
+      const skipped = links.length - added;
+      addLog('info', `${tag} Page ${pageNum}: +${added} new${skipped ? ` (${skipped} known)` : ''} — ${batch.length} total collected`);
 
       // Check for next page
-      const nextPageResp = await sendToTab(botTabId, { type: 'GET_NEXT_PAGE' });
-      pageUrl = nextPageResp?.payload || null;
+      if (fetched) {
+        pageUrl = fetched.nextUrl;
+      } else {
+        const nextPageResp = await sendToTab(tabId, { type: 'GET_NEXT_PAGE' });
+        pageUrl = nextPageResp?.payload || null;
+      }
 
       if (!pageUrl) {
-        addLog('info', `Collection done: ${totalNew} jobs from ${pageNum} page(s)`);
+        addLog('info', `${tag} Collection done: ${batch.length} jobs from ${pageNum} page(s)`);
         break;
       }
 
       pageNum++;
       await randomDelay(2000, 4000);
     }
+  } catch (err) {
+    addLog('error', `${tag} Collection failed on page ${pageNum}: ${err}`);
+  }
 
-    // ── Phase 2: Apply one by one to all collected jobs ──
-    const batchEnd = jobs.length;
-    if (batchEnd === batchStartIndex) {
-      addLog('info', 'No new jobs to apply, moving to next search URL');
-      await randomDelay(2000, 4000);
-      continue;
-    }
-
-    state = 'applying';
-    broadcastStatus();
+  return batch;
+}
 
-    for (let i = batchStartIndex; i < batchEnd; i++) {
-      if (stopRequested) break;
-      if ((state as BotState) === 'paused') {
-        while ((state as BotState) === 'paused' && !stopRequested) {
-          await delay(1000);
-        }
-      }
-      if (stopRequested) break;
+/**
+ * Apply to a collected batch with one worker per apply tab — normally just the bot tab.
+ * Returns false once max applies is reached.
+ */
+async function applyBatch(batch: JobEntry[], tabIds: number[]): Promise<boolean> {
+  let nextIndex = 0;
+  const claimNext = (): JobEntry | null => (nextIndex < batch.length ? batch[nextIndex++] : null);
 
-      if (settings!.maxApplies > 0 && appliedCount >= settings!.maxApplies) {
-        addLog('info', `Reached max applies limit (${settings!.maxApplies})`);
-        return;
-      }
+  await Promise.all(tabIds.map(tabId => runApplyWorker(tabId, claimNext)));
 
-      currentJobIndex = i;
-      const job = jobs[i];
+  if (maxAppliesReached()) {
+    addLog('info', `Reached max applies limit (${settings!.maxApplies})`);
+    return false;
+  }
+  return true;
+}
 
-      if (await registry.isKnown(job.jobKey)) {
-        job.status = 'skipped';
-        job.skipReason = 'already_processed';
-        skippedCount++;
-        continue;
-      }
+/** True while applications still running in other tabs could fill the remaining slots. */
+function waitingOnInFlightApplies(): boolean {
+  return !!settings && settings.maxApplies > 0 && !maxAppliesReached()
+    && appliedCount + applyingNow >= settings.maxApplies;
+}
 
-      addLog('info', `[${appliedCount + 1}${settings!.maxApplies ? '/' + settings!.maxApplies : ''}] Applying: ${job.url}`);
+/** Take jobs from the shared batch and apply to them one by one in a single tab. */
+async function runApplyWorker(tabId: number, claimNext: () => JobEntry | null): Promise<void> {
+  let job = claimNext();
+  // Job page for `job`, started early so it loads while the previous delay runs
+  let pageLoad = job ? openJobPage(tabId, job) : null;
 
-      const result = await applyToJob(job);
+  while (job && pageLoad) {
+    if (stopRequested) break;
+    if ((state as BotState) === 'paused') {
+      while ((state as BotState) === 'paused' && !stopRequested) {
+        await delay(1000);
+      }
+    }
+    while (waitingOnInFlightApplies() && !stopRequested) {
+      await delay(1000);
+    }
+    if (stopRequested || maxAppliesReached()) break;
 
-      if (result === true) {
-        job.status = 'applied';
-        appliedCount++;
-        await registry.markApplied(job.jobKey);
-        addLog('info', `Applied successfully to ${job.title || job.url}`);
-      } else if (typeof result === 'string') {
+    // Reserve the slot before any await, so other workers see it when checking maxApplies
+    applyingNow++;
+    currentJobs.set(tabId, job);
+    let result: true | string | false | null = null;
+    try {
+      if (await registry.isKnown(job.jobKey)) {
         job.status = 'skipped';
-        job.skipReason = result;
+        job.skipReason = 'already_processed';
         skippedCount++;
-        await registry.markSkipped(job.jobKey, result);
-        addLog('warning', `Skipped: ${result}`);
       } else {
-        job.status = 'failed';
-        failedCount++;
-        addLog('error', `Failed to apply to ${job.url}`);
+        addLog('info', `[${appliedCount + applyingNow}${settings!.maxApplies ? '/' + settings!.maxApplies : ''}] Applying: ${job.url}`);
+        result = await applyToJob(job, tabId, pageLoad);
       }
+    } finally {
+      applyingNow--;
+      currentJobs.delete(tabId);
+    }
 
-      broadcastStatus();
-      await randomDelay(3000, 7000);
+    if (result === null) {
+      job = claimNext();
+      pageLoad = job ? openJobPage(tabId, job) : null;
+      continue;
+    }
+
+    if (result === true) {
+      job.status = 'applied';
+      appliedCount++;
+      await registry.markApplied(job.jobKey);
+      addLog('info', `Applied successfully to ${job.title || job.url}`);
+    } else if (typeof result === 'string') {
+      job.status = 'skipped';
+      job.skipReason = result;
+      skippedCount++;
+      await registry.markSkipped(job.jobKey, result);
+      addLog('warning', `Skipped: ${result}`);
+    } else {
+      job.status = 'failed';
+      failedCount++;
+      addLog('error', `Failed to apply to ${job.url}`);
     }
 
-    await randomDelay(2000, 4000);
+    broadcastStatus();
+
+    // Keep the human-like gap between applications, but load the next job page during it
+    job = stopRequested ? null : claimNext();
+    pageLoad = job ? openJobPage(tabId, job) : null;
+    await randomDelay(3000, 7000);
   }
 }
 
+/** Navigate a tab to a job page; resolves once it has loaded (false on timeout or error). */
+function openJobPage(tabId: number, job: JobEntry): Promise<boolean> {
+  return navigateTab(tabId, job.url)
+    .then(() => waitForPageReady(tabId, 15000))
+    .catch(() => false);
+}
+
 // ── Apply to Single Job ──
 
-async function applyToJob(job: JobEntry): Promise<true | string | false> {
-  if (!botTabId || !settings) return false;
+/** Absolute http(s) URL on an Indeed host — a redirect elsewhere means an external apply. */
+const INDEED_URL_RE = /^https?:\/\/(?:[a-z0-9-]+\.)*indeed\.com(?:[/?#:]|$)/i;
 
-  // Navigate to job page
-  await navigateTab(botTabId, job.url);
-  await waitForTabLoad(botTabId, 15000);
-  await delay(2000);
+/**
+ * Wait until a smartapply frame reports its wizard controls. The frame itself waits
+ * for them and replies the moment they render; only re-ask when no frame answered
+ * or the frame's wait ran out.
+ */
+async function waitForWizard(tabId: number, timeoutMs: number): Promise<boolean> {
+  const deadline = Date.now() + timeoutMs;
+  for (let attempt = 1; Date.now() < deadline; attempt++) {
+    let readyResp: any;
+    try {
+      readyResp = await sendToTab(tabId, { type: 'WIZARD_READY' });
+      if (readyResp?.payload?.ready) {
+        addLog('info', `Wizard loaded (buttons: ${readyResp.payload.buttons}, inputs: ${readyResp.payload.inputs})`);
+        return true;
+      }
+    } catch { /* smartapply script not injected yet */ }
+    addLog('info', `Waiting for wizard... (attempt ${attempt})`);
+    // No smartapply frame yet: give the iframe a moment to load before asking again
+    if (!readyResp) await delay(1000);
+  }
+  return false;
+}
+
+async function applyToJob(job: JobEntry, tabId: number, pageLoad: Promise<boolean>): Promise<true | string | false> {
+  if (!settings) return false;
+
+  // Job page navigation was started by the caller (possibly during the previous delay)
+  await pageLoad;
 
   // Check URL is still Indeed
-  const tab = await chrome.tabs.get(botTabId);
-  if (!tab.url || !tab.url.includes('indeed.com')) {
+  const tab = await chrome.tabs.get(tabId);
+  if (!tab.url || !INDEED_URL_RE.test(tab.url)) {
     return 'redirected_external';
   }
 
   // Scrape job info
-  const scrapeResponse = await sendToTab(botTabId, { type: 'SCRAPE_JOB' });
+  const scrapeResponse = await sendToTab(tabId, { type: 'SCRAPE_JOB' });
   const jobInfo = scrapeResponse?.payload || {};
   job.title = jobInfo.title;
   job.company = jobInfo.company;
@@ -327,21 +552,23 @@ async function applyToJob(job: JobEntry): Promise<true | string | false> {
         .substring(0, 60);
 
       cvFilename = `CV_${safeTitle}.pdf`;
-
-      // Generate CV-only PDF (for when cover letter has its own field)
-      const cvOnlyHtml = fillCvTemplate(tailored, settings.profile);
-      cvOnlyPdfData = await generatePdfFromHtml(cvOnlyHtml, settings.backendUrl, cvFilename);
-      addLog('info', `CV-only PDF generated: ${cvFilename} (${(cvOnlyPdfData.byteLength / 1024).toFixed(0)}KB)`);
-
-      // Generate CV + cover letter embedded PDF (for when no cover letter field exists)
-      const cvWithCoverHtml = fillCvWithCoverTemplate(tailored, settings.profile);
-      cvPdfData = await generatePdfFromHtml(cvWithCoverHtml, settings.backendUrl, `CV_Cover_${safeTitle}.pdf`);
-      addLog('info', `CV+Cover PDF generated (${(cvPdfData.byteLength / 1024).toFixed(0)}KB)`);
-
-      // Generate standalone cover letter PDF (for the dedicated cover letter field)
-      const coverHtml = fillCoverTemplate(tailored, settings.profile);
       coverFilename = `Cover_${safeTitle}.pdf`;
-      coverPdfData = await generatePdfFromHtml(coverHtml, settings.backendUrl, coverFilename);
+
+      // The three documents are independent, so they go in one batch that the
+      // backend renders side by side in a shared browser context:
+      // - CV only (for when the cover letter has its own field)
+      // - CV + cover letter embedded (for when no cover letter field exists)
+      // - standalone cover letter (for the dedicated cover letter field)
+      const [cvOnlyPdf, cvWithCoverPdf, coverPdf] = await generatePdfsFromHtml([
+        { html: fillCvTemplate(tailored, settings.profile), filename: cvFilename },
+        { html: fillCvWithCoverTemplate(tailored, settings.profile), filename: `CV_Cover_${safeTitle}.pdf` },
+        { html: fillCoverTemplate(tailored, settings.profile), filename: coverFilename },
+      ], settings.backendUrl);
+      cvOnlyPdfData = cvOnlyPdf;
+      cvPdfData = cvWithCoverPdf;
+      coverPdfData = coverPdf;
+      addLog('info', `CV-only PDF generated: ${cvFilename} (${(cvOnlyPdf.byteLength / 1024).toFixed(0)}KB)`);
+      addLog('info', `CV+Cover PDF generated (${(cvWithCoverPdf.byteLength / 1024).toFixed(0)}KB)`);
       addLog('info', `Cover letter PDF generated: ${coverFilename}`);
     } catch (err) {
       addLog('error', `CV generation failed: ${err}`);
@@ -356,7 +583,7 @@ async function applyToJob(job: JobEntry): Promise<true | string | false> {
   }
 
   // Click Apply button
-  const applyResponse = await sendToTab(botTabId, { type: 'CLICK_APPLY' });
+  const applyResponse = await sendToTab(tabId, { type: 'CLICK_APPLY' });
   const applyResult = applyResponse?.payload;
 
   if (applyResult === 'external') return 'external_apply';
@@ -364,25 +591,28 @@ async function applyToJob(job: JobEntry): Promise<true | string | false> {
 
   // Wait for smartapply wizard to load (it opens in an iframe)
   addLog('info', 'Waiting for wizard to load...');
-  let wizardReady = false;
-  for (let attempt = 0; attempt < 15; attempt++) {
-    await delay(2000);
-    try {
-      const readyResp = await sendToTab(botTabId, { type: 'WIZARD_READY' });
-      if (readyResp?.payload?.ready) {
-        addLog('info', `Wizard loaded (buttons: ${readyResp.payload.buttons}, inputs: ${readyResp.payload.inputs})`);
-        wizardReady = true;
-        break;
-      }
-    } catch { /* smartapply script not injected yet */ }
-    addLog('info', `Waiting for wizard... (attempt ${attempt + 1})`);
-  }
-
-  if (!wizardReady) {
+  if (!await waitForWizard(tabId, 30000)) {
     addLog('warning', 'Wizard did not load');
     return 'wizard_failed';
   }
 
+  // Fill and advance command for the smartapply content script, built once per job.
+  // ArrayBuffer is NOT JSON-serializable, so encode as base64 for message passing;
+  // jobKey lets the wizard frame decode the PDFs once instead of on every step.
+  const fillMessage: Message = {
+    type: 'FILL_AND_ADVANCE',
+    payload: {
+      jobKey: job.jobKey,
+      cvData: cvPdfData ? bufferToBase64(cvPdfData) : undefined,
+      cvOnlyData: cvOnlyPdfData ? bufferToBase64(cvOnlyPdfData) : undefined,
+      cvFilename,
+      coverData: coverPdfData ? bufferToBase64(coverPdfData) : undefined,
+      coverFilename,
+      jobTitle: job.title || '',
+      baseProfile: settings.personalization.baseProfile || '',
+    },
+  };
+
   // Walk through wizard steps
   const startTime = Date.now();
   const MAX_STEPS = 10;
@@ -394,28 +624,15 @@ async function applyToJob(job: JobEntry): Promise<true | string | false> {
       break;
     }
 
-    // Send fill and advance command to smartapply content script.
-    // ArrayBuffer is NOT JSON-serializable, so convert to number[] for message passing.
-    const stepResponse = await sendToTab(botTabId, {
-      type: 'FILL_AND_ADVANCE',
-      payload: {
-        cvData: cvPdfData ? Array.from(new Uint8Array(cvPdfData)) : undefined,
-        cvOnlyData: cvOnlyPdfData ? Array.from(new Uint8Array(cvOnlyPdfData)) : undefined,
-        cvFilename,
-        coverData: coverPdfData ? Array.from(new Uint8Array(coverPdfData)) : undefined,
-        coverFilename,
-        jobTitle: job.title || '',
-        baseProfile: settings?.personalization?.baseProfile || '',
-      },
-    });
+    const stepResponse = await sendToTab(tabId, fillMessage);
 
     const stepResult = stepResponse?.payload?.action;
     addLog('info', `Wizard step ${step + 1}: action="${stepResult || 'none'}", payload=${JSON.stringify(stepResponse?.payload || {}).substring(0, 200)}`);
 
-    // If no response (smartapply not ready yet), wait and retry
+    // If no response (the wizard frame is reloading), retry once its controls are back
     if (!stepResult) {
-      addLog('info', `Wizard step ${step + 1}: no response, retrying in 2s...`);
-      await delay(2000);
+      addLog('info', `Wizard step ${step + 1}: no response, waiting for the wizard frame...`);
+      await waitForWizard(tabId, 10000);
       continue;
     }
 
@@ -425,42 +642,32 @@ async function applyToJob(job: JobEntry): Promise<true | string | false> {
       return true;
     } else if (stepResult === 'needs_input') {
       // Notify user
-      state = 'waiting_user';
-      broadcastStatus();
-      await notifyUserInput(
-        job.title || 'Unknown job',
-        stepResponse?.payload?.fieldLabel || 'Unknown field',
-        botTabId
-      );
-      addLog('warning', `User input needed: ${stepResponse?.payload?.fieldLabel}`);
-      // Wait for user to fill the field (poll every 5s for up to 5 minutes)
-      for (let wait = 0; wait < 60; wait++) {
-        if (stopRequested) return false;
-        await delay(5000);
-        // Check if field is now filled
-        const retryResponse = await sendToTab(botTabId, {
-          type: 'FILL_AND_ADVANCE',
-          payload: {
-            cvData: cvPdfData ? Array.from(new Uint8Array(cvPdfData)) : undefined,
-            cvOnlyData: cvOnlyPdfData ? Array.from(new Uint8Array(cvOnlyPdfData)) : undefined,
-            cvFilename,
-            coverData: coverPdfData ? Array.from(new Uint8Array(coverPdfData)) : undefined,
-            coverFilename,
-            jobTitle: job.title || '',
-            baseProfile: settings?.personalization?.baseProfile || '',
-          },
-        });
-        if (retryResponse?.payload?.action !== 'needs_input') {
-          state = 'applying';
-          if (retryResponse?.payload?.action === 'submitted') return true;
-          break;
+      beginWaitingUser();
+      try {
+        await notifyUserInput(
+          job.title || 'Unknown job',
+          stepResponse?.payload?.fieldLabel || 'Unknown field',
+          tabId
+        );
+        addLog('warning', `User input needed: ${stepResponse?.payload?.fieldLabel}`);
+        // Wait for user to fill the field (poll every 5s for up to 5 minutes)
+        for (let wait = 0; wait < 60; wait++) {
+          if (stopRequested) return false;
+          await delay(5000);
+          // Check if field is now filled
+          const retryResponse = await sendToTab(tabId, fillMessage);
+          if (retryResponse?.payload?.action !== 'needs_input') {
+            if (retryResponse?.payload?.action === 'submitted') return true;
+            break;
+          }
         }
+      } finally {
+        endWaitingUser();
       }
-      state = 'applying';
     } else if (stepResult === 'continued') {
       await delay(2000);
       // Check for confirmation page
-      const tabInfo = await chrome.tabs.get(botTabId);
+      const tabInfo = await chrome.tabs.get(tabId);
       const url = tabInfo.url || '';
       if (url.includes('confirmation') || url.includes('submitted') || url.includes('success')) {
         return true;
@@ -478,7 +685,7 @@ async function applyToJob(job: JobEntry): Promise<true | string | false> {
   // Last resort: try one final submit click before giving up
   addLog('info', 'Wizard loop ended — attempting final submit...');
   try {
-    const finalResp = await sendToTab(botTabId, {
+    const finalResp = await sendToTab(tabId, {
       type: 'FILL_AND_ADVANCE',
       payload: { jobTitle: job.title || '', baseProfile: settings?.personalization?.baseProfile || '' },
     });
@@ -3,6 +3,8 @@
  * Runs all bot tabs in a dedicated Chrome tab group.
  */
 
+import { Message } from '../types';
+
 let groupId: number | null = null;
 
 export async function createTabGroup(url: string): Promise<{ tabId: number; groupId: number }> {
@@ -17,6 +19,16 @@ export async function createTabGroup(url: string): Promise<{ tabId: number; grou
   return { tabId: tab.id!, groupId: gId };
 }
 
+/** Whether a tab still exists (the user may have closed it between runs). */
+export async function tabExists(tabId: number): Promise<boolean> {
+  try {
+    await chrome.tabs.get(tabId);
+    return true;
+  } catch {
+    return false;
+  }
+}
+
 export async function addTabToGroup(url: string): Promise<number> {
   const tab = await chrome.tabs.create({ url, active: false });
   if (groupId !== null) {
@@ -35,7 +47,14 @@ export async function navigateTab(tabId: number, url: string): Promise<void> {
   await chrome.tabs.update(tabId, { url });
 }
 
-export async function waitForTabLoad(tabId: number, timeoutMs = 15000): Promise<boolean> {
+/**
+ * Resolve once the page in a tab is ready for content-script messages: when the
+ * Indeed content script announces itself (document_idle, right after the DOM is
+ * parsed) or when the tab reports 'complete', whichever comes first. Waiting for
+ * 'complete' alone also waits for images, ads and tracking pixels; the content
+ * scripts wait for the exact elements they need themselves. False on timeout.
+ */
+export async function waitForPageReady(tabId: number, timeoutMs = 15000): Promise<boolean> {
   return new Promise(resolve => {
     let resolved = false;
 
@@ -43,6 +62,7 @@ export async function waitForTabLoad(tabId: number, timeoutMs = 15000): Promise<
       if (resolved) return;
       resolved = true;
       chrome.tabs.onUpdated.removeListener(listener);
+      chrome.runtime.onMessage.removeListener(onAnnounce);
       resolve(result);
     };
 
@@ -52,7 +72,15 @@ export async function waitForTabLoad(tabId: number, timeoutMs = 15000): Promise<
       }
     };
 
+    const onAnnounce = (message: Message, sender: chrome.runtime.MessageSender) => {
+      if (message.type === 'STATUS_UPDATE' && message.payload?.contentScript
+        && sender.tab?.id === tabId && sender.frameId === 0) {
+        done(true);
+      }
+    };
+
     chrome.tabs.onUpdated.addListener(listener);
+    chrome.runtime.onMessage.addListener(onAnnounce);
     setTimeout(() => done(false), timeoutMs);
   });
 }
@@ -5,95 +5,150 @@
  */
 
 import { Message, JobInfo } from '../types';
-import { findFirst, findAll, clickFirst, isVisible } from '../utils/selectors';
+import { findFirst, isVisible, waitForSelector, waitForFirst } from '../utils/selectors';
 import {
   APPLY_BUTTON_SELECTORS,
-  APPLY_HEURISTIC_KEYWORDS,
-  EXTERNAL_APPLY_KEYWORDS,
+  APPLY_HEURISTIC_RE,
+  DISMISS_LABEL_RE,
+  EXTERNAL_APPLY_RE,
 } from '../utils/i18n';
 
 // ── URL Validation ──
 
-function isIndeedUrl(url: string): boolean {
-  try {
-    const host = new URL(url).hostname;
-    return host.endsWith('indeed.com');
-  } catch {
-    return false;
-  }
+function isIndeedHost(host: string): boolean {
+  return host.endsWith('indeed.com');
+}
+
+/** Absolute http(s) URL on an Indeed host — checked without a full URL parse. */
+const INDEED_URL_RE = /^https?:\/\/(?:[a-z0-9-]+\.)*indeed\.com(?:[/?#:]|$)/i;
+
+const JK_PARAM_RE = /[?&]jk=([^&#]+)/;
+const VJK_PARAM_RE = /[?&]vjk=([^&#]+)/;
+
+function jobKeyFromHref(href: string): string | null {
+  const match = JK_PARAM_RE.exec(href) || VJK_PARAM_RE.exec(href);
+  return match ? decodeURIComponent(match[1]) : null;
 }
 
-function extractJobKey(url: string): string | null {
+/**
+ * Resolve a job link once and take both the host check and the job key from it.
+ * `indeedOrigin` is the base URL's origin when it is an Indeed page: root-relative
+ * card links (`/rc/clk?jk=…`, the usual case) then skip URL parsing altogether,
+ * as do absolute links on an Indeed host.
+ */
+function parseJobLink(href: string, baseUrl: string, indeedOrigin: string | null): JobLink | null {
+  if (!href) return null;
   try {
-    const params = new URL(url).searchParams;
-    return params.get('jk') || params.get('vjk') || null;
+    if (indeedOrigin && href[0] === '/' && href[1] !== '/') {
+      const jobKey = jobKeyFromHref(href);
+      return jobKey ? { url: indeedOrigin + href, jobKey } : null;
+    }
+    if (INDEED_URL_RE.test(href)) {
+      const jobKey = jobKeyFromHref(href);
+      return jobKey ? { url: href, jobKey } : null;
+    }
+    const url = new URL(href, baseUrl);
+    if (!isIndeedHost(url.hostname)) return null;
+    const jobKey = url.searchParams.get('jk') || url.searchParams.get('vjk');
+    return jobKey ? { url: url.href, jobKey } : null;
   } catch {
     return null;
   }
 }
 
-// ── Job Link Collection ──
+// ── Page Readiness ──
 
-function collectIndeedApplyLinks(): { url: string; jobKey: string }[] {
-  const links: { url: string; jobKey: string }[] = [];
-  const cards = document.querySelectorAll('div[data-testid="slider_item"]');
+/** Result cards on a search page; their presence means the list has rendered. */
+const RESULT_CARD_SELECTOR = 'div[data-testid="slider_item"]';
 
-  for (const card of cards) {
-    const indeedApply = card.querySelector('[data-testid="indeedApply"]');
-    if (!indeedApply) continue;
+/** Title link of every result card that offers Indeed Apply. */
+const APPLY_CARD_LINK_SELECTOR = `${RESULT_CARD_SELECTOR}:has([data-testid="indeedApply"]) a.jcs-JobTitle`;
 
-    const linkEl = card.querySelector('a.jcs-JobTitle') as HTMLAnchorElement | null;
-    if (!linkEl) continue;
+/** Anything identifying a job detail page, so scraping can start as soon as it renders. */
+const JOB_PAGE_SELECTOR = 'h1[class*="JobInfoHeader"], h1[data-testid="jobsearch-JobInfoHeader-title"], #jobDescriptionText';
 
-    let jobUrl = linkEl.getAttribute('href') || '';
-    if (jobUrl.startsWith('/')) {
-      jobUrl = `${window.location.origin}${jobUrl}`;
-    }
+/** How long to wait for the page content before working with whatever is there. */
+const READY_TIMEOUT_MS = 8000;
 
-    if (!isIndeedUrl(jobUrl)) continue;
+/** Extra wait for an apply button once the job page itself has rendered. */
+const APPLY_BUTTON_WAIT_MS = 3000;
 
-    const jobKey = extractJobKey(jobUrl);
-    if (jobKey) {
-      links.push({ url: jobUrl, jobKey });
-    }
+// ── Job Link Collection ──
+
+type JobLink = { url: string; jobKey: string };
+
+/** Collect Indeed Apply links from a search results document (live or fetched). */
+function collectIndeedApplyLinks(root: ParentNode = document, baseUrl: string = window.location.href): JobLink[] {
+  const links: JobLink[] = [];
+  // One page-level query for the title links of Indeed Apply cards, instead of
+  // two card-level queries per result
+  const titleLinks = root.querySelectorAll(APPLY_CARD_LINK_SELECTOR);
+  const base = new URL(baseUrl);
+  const indeedOrigin = isIndeedHost(base.hostname) ? base.origin : null;
+
+  for (const linkEl of titleLinks) {
+    const link = parseJobLink(linkEl.getAttribute('href') || '', baseUrl, indeedOrigin);
+    if (link) links.push(link);
   }
 
   return links;
 }
 
+/**
+ * Fetch another results page in the background and parse it without navigating.
+ * Returns null when the page can't be used (other origin, error, challenge page,
+ * client-rendered list) so the caller can fall back to navigating the tab.
+ */
+async function fetchResultsPage(url: string): Promise<{ links: JobLink[]; nextUrl: string | null } | null> {
+  try {
+    if (new URL(url, window.location.href).origin !== window.location.origin) return null;
+
+    const resp = await fetch(url, { credentials: 'include' });
+    if (!resp.ok) return null;
+
+    const doc = new DOMParser().parseFromString(await resp.text(), 'text/html');
+    if (!doc.querySelector(RESULT_CARD_SELECTOR)) return null;
+
+    return {
+      links: collectIndeedApplyLinks(doc, resp.url),
+      nextUrl: getNextPageUrl(doc, resp.url),
+    };
+  } catch {
+    return null;
+  }
+}
+
 // ── External Apply Detection ──
 
 function isExternalApplyButton(btn: Element): boolean {
-  const text = (btn.textContent || '').toLowerCase();
-  const label = (btn.getAttribute('aria-label') || '').toLowerCase();
-  const combined = `${text} ${label}`;
-  return EXTERNAL_APPLY_KEYWORDS.some(kw => combined.includes(kw));
+  return EXTERNAL_APPLY_RE.test(`${btn.textContent || ''} ${btn.getAttribute('aria-label') || ''}`);
 }
 
 // ── Apply Button ──
 
-function findAndClickApply(): 'clicked' | 'external' | 'not_found' {
+async function findAndClickApply(): Promise<'clicked' | 'external' | 'not_found'> {
+  // One wait over the whole selector list: the job header is up by now, but the
+  // apply button (external ones match too, e.g. "Candidatar-se no site") can lag
+  const applyBtn = await waitForFirst(APPLY_BUTTON_SELECTORS, document, APPLY_BUTTON_WAIT_MS);
+
+  // Visible buttons are collected once and shared by the external check and the heuristic
+  const visibleBtns = Array.from(document.getElementsByTagName('button')).filter(isVisible);
+
   // Check for external apply buttons first
-  const allBtns = findAll('button', document);
-  for (const btn of allBtns) {
-    if (isVisible(btn) && isExternalApplyButton(btn)) {
-      return 'external';
-    }
+  if (visibleBtns.some(isExternalApplyButton)) {
+    return 'external';
   }
 
-  // Try specific selectors
-  if (clickFirst(APPLY_BUTTON_SELECTORS)) {
+  // Highest-priority specific selector
+  if (applyBtn instanceof HTMLElement) {
+    applyBtn.click();
     return 'clicked';
   }
 
-  // Heuristic fallback: scan visible buttons by text
-  const visibleBtns = allBtns.filter(isVisible);
+  // Heuristic fallback: scan visible buttons by text (none are external at this point)
   for (const btn of visibleBtns) {
-    if (isExternalApplyButton(btn)) continue;
-    const label = (btn.getAttribute('aria-label') || '').toLowerCase();
-    const text = (btn.textContent || '').toLowerCase();
-    if (['close', 'cancel', 'fermer', 'annuler', 'fechar'].some(x => label.includes(x))) continue;
-    if (APPLY_HEURISTIC_KEYWORDS.some(kw => text.includes(kw))) {
+    if (DISMISS_LABEL_RE.test(btn.getAttribute('aria-label') || '')) continue;
+    if (APPLY_HEURISTIC_RE.test(btn.textContent || '')) {
       (btn as HTMLElement).click();
       return 'clicked';
     }
@@ -104,44 +159,40 @@ function findAndClickApply(): 'clicked' | 'external' | 'not_found' {
 
 // ── Job Scraping ──
 
-function scrapeJobDescription(): JobInfo {
-  const titleSelectors = [
-    'h1.jobsearch-JobInfoHeader-title',
-    'h1[data-testid="jobsearch-JobInfoHeader-title"]',
-    'h1[class*="JobInfoHeader"]',
-    'h2.jobTitle',
-  ];
-  const companySelectors = [
-    '[data-testid="inlineHeader-companyName"]',
-    '[data-testid="company-name"]',
-    'div[data-company-name] a',
-    'span.css-1cjkto6',
-  ];
-  const descSelectors = [
-    '#jobDescriptionText',
-    'div.jobsearch-JobComponent-description',
-    '[data-testid="jobDescriptionText"]',
-  ];
+const JOB_TITLE_SELECTORS = [
+  'h1.jobsearch-JobInfoHeader-title',
+  'h1[data-testid="jobsearch-JobInfoHeader-title"]',
+  'h1[class*="JobInfoHeader"]',
+  'h2.jobTitle',
+];
+const JOB_COMPANY_SELECTORS = [
+  '[data-testid="inlineHeader-companyName"]',
+  '[data-testid="company-name"]',
+  'div[data-company-name] a',
+  'span.css-1cjkto6',
+];
+const JOB_DESCRIPTION_SELECTORS = [
+  '#jobDescriptionText',
+  'div.jobsearch-JobComponent-description',
+  '[data-testid="jobDescriptionText"]',
+];
 
-  function getText(selectors: string[]): string {
-    for (const sel of selectors) {
-      const el = document.querySelector(sel);
-      if (el) return el.textContent?.trim() || '';
-    }
-    return '';
-  }
+function scrapeJobDescription(): JobInfo {
+  // findFirst walks the DOM once per field and still honours selector priority
+  const getText = (selectors: string[]): string =>
+    findFirst(selectors)?.textContent?.trim() || '';
 
   return {
-    title: getText(titleSelectors),
-    company: getText(companySelectors),
-    description: getText(descSelectors),
+    title: getText(JOB_TITLE_SELECTORS),
+    company: getText(JOB_COMPANY_SELECTORS),
+    description: getText(JOB_DESCRIPTION_SELECTORS),
     url: window.location.href,
   };
 }
 
 // ── Pagination ──
 
-function getNextPageUrl(): string | null {
+function getNextPageUrl(root: ParentNode = document, baseUrl: string = window.location.href): string | null {
   // Indeed pagination: look for the "Next" / "Próxima" link
   const nextSelectors = [
     'a[data-testid="pagination-page-next"]',
@@ -152,24 +203,28 @@ function getNextPageUrl(): string | null {
     'a[aria-label="Próxima"]',
   ];
 
-  for (const sel of nextSelectors) {
-    const el = document.querySelector(sel) as HTMLAnchorElement | null;
-    if (el && el.href) {
-      // Ensure it's a full URL
-      if (el.href.startsWith('/')) {
-        return `${window.location.origin}${el.href}`;
-      }
-      return el.href;
+  // Resolve against the page the markup came from, not the document parsing it
+  const absolute = (href: string | null): string | null => {
+    if (!href) return null;
+    try {
+      return new URL(href, baseUrl).href;
+    } catch {
+      return null;
     }
+  };
+
+  for (const sel of nextSelectors) {
+    const href = absolute(root.querySelector(sel)?.getAttribute('href') ?? null);
+    if (href) return href;
   }
 
   // Heuristic: find a link/button with "next" or "próxima" text
-  const navLinks = document.querySelectorAll('nav a, [aria-label*="agina"] a');
+  const navLinks = root.querySelectorAll('nav a, [aria-label*="agina"] a');
   for (const link of navLinks) {
     const text = (link.textContent || '').toLowerCase().trim();
     const label = (link.getAttribute('aria-label') || '').toLowerCase();
     if (text.includes('next') || text.includes('próxima') || label.includes('next') || label.includes('próxima')) {
-      const href = (link as HTMLAnchorElement).href;
+      const href = absolute(link.getAttribute('href'));
       if (href) return href;
     }
   }
@@ -184,18 +239,21 @@ chrome.runtime.onMessage.addListener((message: Message, _sender, sendResponse) =
   // Return false for unknown messages so smartapply.js (in iframe) can handle them.
   switch (message.type) {
     case 'COLLECT_LINKS': {
-      const links = collectIndeedApplyLinks();
-      sendResponse({ type: 'LINKS_COLLECTED', payload: links });
+      waitForSelector(RESULT_CARD_SELECTOR, document, READY_TIMEOUT_MS).then(() => {
+        sendResponse({ type: 'LINKS_COLLECTED', payload: collectIndeedApplyLinks() });
+      });
       return true;
     }
     case 'CLICK_APPLY': {
-      const result = findAndClickApply();
-      sendResponse({ type: 'APPLY_RESULT', payload: result });
+      findAndClickApply().then(result => {
+        sendResponse({ type: 'APPLY_RESULT', payload: result });
+      });
       return true;
     }
     case 'SCRAPE_JOB': {
-      const info = scrapeJobDescription();
-      sendResponse({ type: 'JOB_SCRAPED', payload: info });
+      waitForSelector(JOB_PAGE_SELECTOR, document, READY_TIMEOUT_MS).then(() => {
+        sendResponse({ type: 'JOB_SCRAPED', payload: scrapeJobDescription() });
+      });
       return true;
     }
     case 'GET_NEXT_PAGE': {
@@ -203,6 +261,12 @@ chrome.runtime.onMessage.addListener((message: Message, _sender, sendResponse) =
       sendResponse({ type: 'NEXT_PAGE', payload: nextUrl });
       return true;
     }
+    case 'FETCH_RESULTS_PAGE': {
+      fetchResultsPage(message.payload).then(page => {
+        sendResponse({ type: 'LINKS_COLLECTED', payload: page });
+      });
+      return true;
+    }
     case 'GET_STATE': {
       sendResponse({ type: 'STATUS_UPDATE', payload: { ready: true, url: window.location.href } });
       return true;
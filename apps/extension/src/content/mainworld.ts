@@ -13,9 +13,7 @@
 interface SetFilesMessage {
   type: 'smartapply-set-files';
   selector: string;
-  fileName: string;
-  fileType: string;
-  fileDataBase64: string;
+  file: File;
 }
 
 window.addEventListener('message', (event: MessageEvent) => {
@@ -23,7 +21,7 @@ window.addEventListener('message', (event: MessageEvent) => {
   if (event.source !== window) return;
   if (!event.data || event.data.type !== 'smartapply-set-files') return;
 
-  const { selector, fileName, fileType, fileDataBase64 } = event.data as SetFilesMessage;
+  const { selector, file } = event.data as SetFilesMessage;
 
   try {
     const input = document.querySelector<HTMLInputElement>(selector);
@@ -33,13 +31,7 @@ window.addEventListener('message', (event: MessageEvent) => {
       return;
     }
 
-    // Decode base64 → File object in MAIN world
-    console.log('[smartapply-main] base64 length:', fileDataBase64.length);
-    const binaryStr = atob(fileDataBase64);
-    const bytes = new Uint8Array(binaryStr.length);
-    for (let i = 0; i < binaryStr.length; i++) bytes[i] = binaryStr.charCodeAt(i);
-    const file = new File([bytes], fileName, { type: fileType });
-    console.log('[smartapply-main] decoded file size:', file.size, 'bytes');
+    console.log('[smartapply-main] received file:', file.name, file.size, 'bytes');
 
     // Set files via DataTransfer in MAIN world
     const dt = new DataTransfer();
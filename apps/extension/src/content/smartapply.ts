@@ -5,36 +5,113 @@
  * All form answers are resolved by Claude using the user's baseProfile markdown.
  */
 
-import { Message } from '../types';
+import { Message, LogEntry } from '../types';
 import {
-  findFirst, findAll, clickFirst, isVisible, isDisabled,
+  findFirst, clickFirst, isVisible, isDisabled,
   fillInput, selectOption, setInputFiles, getLabelForInput, verifyUploadAccepted,
   getInputConstraints, validateAnswer, detectValidationError,
-  InputConstraints,
+  InputConstraints, DATE_HINT_RE, DATE_FORMAT_RE, waitForSelector, waitForFirst, waitForDomSettle,
 } from '../utils/selectors';
 import {
   SUBMIT_SELECTORS, CONTINUE_SELECTORS,
-  SUBMIT_KEYWORDS, CONTINUE_KEYWORDS, SKIP_KEYWORDS,
+  SUBMIT_RE, CONTINUE_RE, SKIP_RE,
   RESUME_OPTIONS_SELECTORS, UPLOAD_BUTTON_SELECTORS,
-  COVER_LETTER_SELECTORS, RESUME_CARD_SELECTORS,
+  COVER_LETTER_SELECTORS, RESUME_CARD_SELECTORS, keywordPattern,
 } from '../utils/i18n';
+import { base64ToBuffer } from '../utils/binary';
 
 // ── State ──
 
+/** Controls that mean the wizard step has rendered. */
+const WIZARD_CONTROL_SELECTOR = 'button, input';
+/** How long a frame waits for those controls before answering WIZARD_READY. */
+const WIZARD_READY_WAIT_MS = 5000;
+
 let currentJobTitle = '';
 let currentBaseProfile = '';
 
+// ── Date field detection ──
+
+/** aria-label mentioning a date (data/date). */
+const DATE_ARIA_RE = /dat[ae]/i;
+
+/** Question wording that suggests a date answer. */
+const DATE_LABEL_RE = /\b(data|date|when|quando|início|start|término|end|from|until|até)\b/i;
+
+/**
+ * Date format spelled out in the step's text (e.g. "DD/MM/YYYY"). innerText forces
+ * layout, so a reader keeps the first match for the rest of a pass over the fields;
+ * a miss is retried, since error messages may spell the format out later.
+ */
+function pageDateFormatReader(): () => string | null {
+  let format: string | null = null;
+  return () => {
+    if (!format) format = (document.body?.innerText || '').match(DATE_FORMAT_RE)?.[1] || null;
+    return format;
+  };
+}
+
+/** Example value shown to the AI for a date format hint. */
+function dateExample(format: string): string {
+  return format === 'DD/MM/YYYY' ? '15/03/2024' :
+    format === 'MM/DD/YYYY' ? '03/15/2024' : '2024-03-15';
+}
+
+// ── Select helpers ──
+
+/** Non-placeholder options of a <select> (those with a value). */
+function readSelectOptions(sel: HTMLSelectElement): { texts: string[]; values: string[] } {
+  const texts: string[] = [];
+  const values: string[] = [];
+  for (const opt of sel.options) {
+    if (opt.value) {
+      texts.push(opt.textContent?.trim() || '');
+      values.push(opt.value);
+    }
+  }
+  return { texts, values };
+}
+
+/** Index of the option matching `answer`: exact, then case-insensitive, then partial; -1 if none. */
+function matchOptionIndex(answer: string, optionTexts: string[]): number {
+  const exact = optionTexts.indexOf(answer);
+  if (exact >= 0) return exact;
+  const lower = answer.toLowerCase().trim();
+  const normalized = optionTexts.map(t => t.toLowerCase().trim());
+  const caseless = normalized.indexOf(lower);
+  if (caseless >= 0) return caseless;
+  return normalized.findIndex(t => t.includes(lower) || lower.includes(t));
+}
+
 // ── Helpers ──
 
-function log(msg: string, level: 'info' | 'warning' | 'error' = 'info'): void {
-  console.log(`[smartapply] ${msg}`);
+/** Window in which wizard log lines are gathered into one ADD_LOG message. */
+const LOG_FLUSH_MS = 50;
+let pendingLogs: Pick<LogEntry, 'level' | 'message'>[] = [];
+let logFlushTimer: ReturnType<typeof setTimeout> | null = null;
+
+function flushLogs(): void {
+  if (logFlushTimer) clearTimeout(logFlushTimer);
+  logFlushTimer = null;
+  if (!pendingLogs.length) return;
   // Send to Activity Log in the popup UI (fire-and-forget)
-  chrome.runtime.sendMessage({
-    type: 'ADD_LOG',
-    payload: { level, message: `[wizard] ${msg}` },
-  }).catch(() => {});
+  chrome.runtime.sendMessage({ type: 'ADD_LOG', payload: { entries: pendingLogs } }).catch(() => {});
+  pendingLogs = [];
+}
+
+function log(msg: string, level: LogEntry['level'] = 'info'): void {
+  console.log(`[smartapply] ${msg}`);
+  // A wizard step logs a burst of lines; they cross to the service worker together
+  pendingLogs.push({ level, message: `[wizard] ${msg}` });
+  if (!logFlushTimer) logFlushTimer = setTimeout(flushLogs, LOG_FLUSH_MS);
 }
 
+// Don't lose the last lines when a click navigates the wizard frame
+window.addEventListener('pagehide', flushLogs);
+
+/** DOM quiet time after which a click or fill counts as rendered. */
+const SETTLE_QUIET_MS = 100;
+
 function waitMs(ms: number): Promise<void> {
   return new Promise(r => setTimeout(r, ms));
 }
@@ -92,26 +169,47 @@ async function askClaude(
 
 // ── Resume Upload ──
 
+/** Resume-selection widgets; each covers both the new and the old data-testid pattern. */
+const RESUME_FILE_INPUT_SELECTOR =
+  '[data-testid="resume-selection-file-resume-upload-radio-card-file-input"], '
+  + '[data-testid="resume-selection-file-resume-radio-card-file-input"]';
+const RESUME_FILE_RADIO_SELECTOR =
+  '[data-testid="resume-selection-file-resume-upload-radio-card-input"], '
+  + '[data-testid="resume-selection-file-resume-radio-card-input"]';
+const RESUME_SELECT_FILE_BUTTON_SELECTOR =
+  '[data-testid="resume-selection-file-resume-upload-radio-card-button"], '
+  + '[data-testid="resume-selection-file-resume-radio-card-button"]';
+const RESUME_SELECTION_PAGE_SELECTOR =
+  '[data-testid*="resume-selection"], [class*="resume-selection"], [id*="resume-selection"]';
+
+const COVER_LETTER_INPUT_SELECTOR =
+  '[data-testid="CoverLetterInput"] input[type="file"], '
+  + 'input[accept*="pdf"][name*="cover"], '
+  + '[data-testid*="coverLetter" i] input[type="file"], '
+  + '[data-testid*="cover-letter" i] input[type="file"]';
+
+/** Anything clickable scanned by text when no known upload control matched. */
+const CLICKABLE_SELECTOR = 'button, a, label, [role="button"]';
+
+const UPLOAD_TEXT_RE = keywordPattern([
+  'upload', 'carregar', 'enviar arquivo', 'escolher arquivo', 'choose file',
+  'select file', 'alterar currículo', 'change resume',
+]);
+const COVER_LETTER_TEXT_RE = keywordPattern([
+  'cover letter', 'carta de apresentação', 'carta de apresentacao',
+  'lettre de motivation', 'anschreiben', 'carta de presentación',
+]);
+
+/** File inputs that can take a PDF (photo pickers excluded). */
+const DOCUMENT_FILE_INPUT_SELECTOR = 'input[type="file"]:not([accept*="image" i])';
+
 async function waitForFileInput(timeoutMs = 3000): Promise<HTMLInputElement | null> {
-  const deadline = Date.now() + timeoutMs;
-  while (Date.now() < deadline) {
-    const inputs = document.querySelectorAll<HTMLInputElement>('input[type="file"]');
-    for (const fi of inputs) {
-      const accept = (fi.getAttribute('accept') || '').toLowerCase();
-      if (accept.includes('image')) continue;
-      return fi;
-    }
-    await waitMs(300);
-  }
-  return null;
+  return await waitForSelector(DOCUMENT_FILE_INPUT_SELECTOR, document, timeoutMs) as HTMLInputElement | null;
 }
 
 /** Find the resume file input (tries both new and old data-testid patterns). */
 function findResumeFileInput(): HTMLInputElement | null {
-  return document.querySelector<HTMLInputElement>(
-    '[data-testid="resume-selection-file-resume-upload-radio-card-file-input"], ' +
-    '[data-testid="resume-selection-file-resume-radio-card-file-input"]'
-  );
+  return document.querySelector<HTMLInputElement>(RESUME_FILE_INPUT_SELECTOR);
 }
 
 /** Check if there's already a CV loaded (ResumeOptionsMenu visible = existing CV). */
@@ -132,11 +230,10 @@ async function resetResumeForNewUpload(): Promise<HTMLInputElement | null> {
 
   log('Resume: existing CV detected, clicking ResumeOptionsMenu to replace');
   optionsMenuBtn.click();
-  await waitMs(800);
 
-  const uploadMenuBtn = document.querySelector<HTMLButtonElement>(
-    '[data-testid="ResumeOptionsMenu-upload"]'
-  );
+  const uploadMenuBtn = await waitForSelector(
+    '[data-testid="ResumeOptionsMenu-upload"]', document, 2000
+  ) as HTMLButtonElement | null;
   if (!uploadMenuBtn) {
     log('Resume: ResumeOptionsMenu-upload button not found');
     return null;
@@ -162,14 +259,10 @@ async function resetResumeForNewUpload(): Promise<HTMLInputElement | null> {
   }
 
   // After reset, the component re-renders with a fresh file input (possibly new testid).
-  const deadline = Date.now() + 3000;
-  while (Date.now() < deadline) {
-    const freshInput = findResumeFileInput();
-    if (freshInput) {
-      log('Resume: component reset, fresh file input ready');
-      return freshInput;
-    }
-    await waitMs(300);
+  const freshInput = await waitForSelector(RESUME_FILE_INPUT_SELECTOR, document, 3000);
+  if (freshInput) {
+    log('Resume: component reset, fresh file input ready');
+    return freshInput as HTMLInputElement;
   }
 
   log('Resume: no file input found after reset');
@@ -178,9 +271,7 @@ async function resetResumeForNewUpload(): Promise<HTMLInputElement | null> {
 
 async function tryResumeSelectionUpload(file: File): Promise<boolean> {
   // Step 1: Ensure the "file resume" radio card is selected
-  const fileRadio = document.querySelector<HTMLInputElement>(
-    '[data-testid="resume-selection-file-resume-upload-radio-card-input"], [data-testid="resume-selection-file-resume-radio-card-input"]'
-  );
+  const fileRadio = document.querySelector<HTMLInputElement>(RESUME_FILE_RADIO_SELECTOR);
   if (fileRadio && !fileRadio.checked) {
     log('Resume: selecting file resume radio card');
     fileRadio.click();
@@ -197,9 +288,9 @@ async function tryResumeSelectionUpload(file: File): Promise<boolean> {
     log('Resume: existing CV loaded, must reset before uploading new one');
     const freshInput = await resetResumeForNewUpload();
     if (freshInput) {
+      // verifyUploadAccepted polls for the new filename, no settle delay needed
       setInputFiles(freshInput, file);
-      await waitMs(1500);
-      if (await verifyUploadAccepted(5000, file.name)) {
+      if (await verifyUploadAccepted(6500, file.name)) {
         log('Resume: upload via reset+setInputFiles worked');
         return true;
       }
@@ -210,8 +301,7 @@ async function tryResumeSelectionUpload(file: File): Promise<boolean> {
     const fileInput = findResumeFileInput();
     if (fileInput) {
       setInputFiles(fileInput, file);
-      await waitMs(1000);
-      if (await verifyUploadAccepted(3000, file.name)) {
+      if (await verifyUploadAccepted(4000, file.name)) {
         log('Resume: direct setInputFiles worked');
         return true;
       }
@@ -219,9 +309,7 @@ async function tryResumeSelectionUpload(file: File): Promise<boolean> {
   }
 
   // Step 3: Try "Selecionar arquivo" button with click intercept
-  const selectFileBtn = document.querySelector<HTMLButtonElement>(
-    '[data-testid="resume-selection-file-resume-upload-radio-card-button"], [data-testid="resume-selection-file-resume-radio-card-button"]'
-  );
+  const selectFileBtn = document.querySelector<HTMLButtonElement>(RESUME_SELECT_FILE_BUTTON_SELECTOR);
   if (selectFileBtn) {
     const currentInput = findResumeFileInput();
     if (currentInput) {
@@ -239,8 +327,7 @@ async function tryResumeSelectionUpload(file: File): Promise<boolean> {
 
       const freshInput = findResumeFileInput() || currentInput;
       setInputFiles(freshInput, file);
-      await waitMs(1000);
-      if (await verifyUploadAccepted(5000, file.name)) {
+      if (await verifyUploadAccepted(6000, file.name)) {
         log('Resume: upload via select file button worked');
         return true;
       }
@@ -258,10 +345,8 @@ async function tryResumeSelectionUpload(file: File): Promise<boolean> {
   }
 
   // Step 5: Fallback — find any non-image file input on the page
-  const allFileInputs = document.querySelectorAll<HTMLInputElement>('input[type="file"]');
+  const allFileInputs = document.querySelectorAll<HTMLInputElement>(DOCUMENT_FILE_INPUT_SELECTOR);
   for (const fi of allFileInputs) {
-    const accept = (fi.getAttribute('accept') || '').toLowerCase();
-    if (accept.includes('image')) continue;
     log('Resume: fallback — setting files on other file input');
     setInputFiles(fi, file);
     if (await verifyUploadAccepted(3000, file.name)) return true;
@@ -280,7 +365,7 @@ async function handleResumeStep(pdfData?: ArrayBuffer, pdfFilename?: string): Pr
   // Detect resume-selection page and use targeted approach first
   const isResumeSelectionPage =
     window.location.href.includes('resume-selection') ||
-    !!document.querySelector('[data-testid*="resume-selection"], [class*="resume-selection"], [id*="resume-selection"]');
+    !!document.querySelector(RESUME_SELECTION_PAGE_SELECTOR);
 
   if (isResumeSelectionPage) {
     log('Detected resume-selection page, using targeted approach');
@@ -302,9 +387,8 @@ async function handleResumeStep(pdfData?: ArrayBuffer, pdfFilename?: string): Pr
   if (optionsBtn) {
     log(`Strategy 2: clicking options: "${(optionsBtn as HTMLElement).textContent?.trim()}"`);
     (optionsBtn as HTMLElement).click();
-    await waitMs(800);
 
-    const uploadBtn = findFirst(UPLOAD_BUTTON_SELECTORS);
+    const uploadBtn = await waitForFirst(UPLOAD_BUTTON_SELECTORS, document, 2000);
     if (uploadBtn) {
       log(`Strategy 2: clicking upload: "${(uploadBtn as HTMLElement).textContent?.trim()}"`);
       (uploadBtn as HTMLElement).click();
@@ -331,13 +415,12 @@ async function handleResumeStep(pdfData?: ArrayBuffer, pdfFilename?: string): Pr
   }
 
   // Strategy 4: Scan ALL clickables for upload-related text
-  const allClickables = [...document.querySelectorAll('button, a, label, [role="button"]')];
-  const uploadKeywords = ['upload', 'carregar', 'enviar arquivo', 'escolher arquivo', 'choose file', 'select file', 'alterar currículo', 'change resume'];
+  const allClickables = [...document.querySelectorAll(CLICKABLE_SELECTOR)];
   for (const el of allClickables) {
     if (!isVisible(el as Element)) continue;
     const text = (el.textContent || '').toLowerCase().trim();
     const ariaLabel = (el.getAttribute('aria-label') || '').toLowerCase();
-    if (uploadKeywords.some(kw => text.includes(kw) || ariaLabel.includes(kw))) {
+    if (UPLOAD_TEXT_RE.test(text) || UPLOAD_TEXT_RE.test(ariaLabel)) {
       log(`Strategy 4: clicking: "${text || ariaLabel}"`);
       (el as HTMLElement).click();
       const fi = await waitForFileInput(3000);
@@ -450,12 +533,7 @@ async function handleCoverLetter(pdfData?: ArrayBuffer, pdfFilename?: string): P
   const file = new File([pdfData], pdfFilename, { type: 'application/pdf' });
 
   // Strategy 1: Direct file input for cover letter
-  const directInput = document.querySelector<HTMLInputElement>(
-    '[data-testid="CoverLetterInput"] input[type="file"], ' +
-    'input[accept*="pdf"][name*="cover"], ' +
-    '[data-testid*="coverLetter" i] input[type="file"], ' +
-    '[data-testid*="cover-letter" i] input[type="file"]'
-  );
+  const directInput = document.querySelector<HTMLInputElement>(COVER_LETTER_INPUT_SELECTOR);
   if (directInput) {
     log('Cover letter strategy 1: direct input found');
     setInputFiles(directInput, file);
@@ -476,13 +554,11 @@ async function handleCoverLetter(pdfData?: ArrayBuffer, pdfFilename?: string): P
   }
 
   // Strategy 3: Scan all clickables for cover letter keywords
-  const allClickables = [...document.querySelectorAll('button, a, label, [role="button"]')];
-  const coverKeywords = ['cover letter', 'carta de apresentação', 'carta de apresentacao',
-                         'lettre de motivation', 'anschreiben', 'carta de presentación'];
+  const allClickables = [...document.querySelectorAll(CLICKABLE_SELECTOR)];
   for (const el of allClickables) {
     if (!isVisible(el as Element)) continue;
     const text = (el.textContent || '').toLowerCase().trim();
-    if (coverKeywords.some(kw => text.includes(kw))) {
+    if (COVER_LETTER_TEXT_RE.test(text)) {
       log(`Cover letter strategy 3: clicking "${text}"`);
       (el as HTMLElement).click();
       const fi = await waitForFileInput(3000);
@@ -508,7 +584,7 @@ async function handleSpecialPages(): Promise<boolean> {
     if (optinRadio && !optinRadio.checked) {
       optinRadio.click();
       log('🔒 Clicked optin radio');
-      await waitMs(300);
+      await waitForDomSettle(document, SETTLE_QUIET_MS, 300);
     }
     const continueBtn = privacyForm.querySelector<HTMLButtonElement>('[data-testid="continue-button"]');
     if (continueBtn) {
@@ -534,7 +610,7 @@ async function handleSpecialPages(): Promise<boolean> {
     if (autoCheckKeywords.some(kw => lower.includes(kw))) {
       cb.click();
       log(`☑️ Auto-checked: "${label}"`);
-      await waitMs(200);
+      await waitForDomSettle(document, SETTLE_QUIET_MS, 200);
     }
   }
 
@@ -553,20 +629,17 @@ function getSimplifiedDom(): string {
   if (h1) parts.push(`<h1>${h1.textContent?.trim()}</h1>`);
 
   // Forms
-  const forms = document.querySelectorAll('form');
-  for (const form of forms) {
+  for (const form of document.forms) {
     const testId = form.getAttribute('data-testid') || '';
     parts.push(`<form data-testid="${testId}">`);
 
     // Fieldsets with labels
-    const fieldsets = form.querySelectorAll('fieldset');
-    for (const fs of fieldsets) {
+    for (const fs of form.getElementsByTagName('fieldset')) {
       const role = fs.getAttribute('role') || '';
       const fsTestId = fs.getAttribute('data-testid') || '';
       parts.push(`  <fieldset role="${role}" data-testid="${fsTestId}">`);
 
-      const inputs = fs.querySelectorAll('input');
-      for (const inp of inputs) {
+      for (const inp of fs.getElementsByTagName('input')) {
         const type = inp.type;
         const val = inp.value;
         const checked = inp.checked ? ' checked' : '';
@@ -590,8 +663,7 @@ function getSimplifiedDom(): string {
   }
 
   // Visible buttons
-  const buttons = document.querySelectorAll('button');
-  for (const btn of buttons) {
+  for (const btn of document.getElementsByTagName('button')) {
     if (!isVisible(btn)) continue;
     const text = btn.textContent?.trim() || '';
     const testId = btn.getAttribute('data-testid') || '';
@@ -643,8 +715,7 @@ ${simplifiedDom}`;
 
   if (answer.startsWith('CLICK_TEXT:')) {
     const text = answer.substring(11).trim().toLowerCase();
-    const buttons = document.querySelectorAll('button');
-    for (const btn of buttons) {
+    for (const btn of document.getElementsByTagName('button')) {
       if (!isVisible(btn)) continue;
       if ((btn.textContent || '').toLowerCase().trim().includes(text)) {
         (btn as HTMLElement).click();
@@ -671,8 +742,25 @@ ${simplifiedDom}`;
 
 // ── Questionnaire Handling (all via Claude) ──
 
+/** Radios keyed by group name, in document order — hidden ones too, as they can hold the checked option. */
+function collectRadioGroups(): Map<string, HTMLInputElement[]> {
+  const radioGroups = new Map<string, HTMLInputElement[]>();
+  for (const radio of document.querySelectorAll<HTMLInputElement>('input[type="radio"]')) {
+    if (!radio.name) continue;
+    const group = radioGroups.get(radio.name);
+    if (group) group.push(radio);
+    else radioGroups.set(radio.name, [radio]);
+  }
+  return radioGroups;
+}
+
 async function handleQuestionnaire(): Promise<{ needsUserInput: boolean; fieldLabel?: string }> {
   const MAX_RETRIES = 2;
+  const pageDateFormat = pageDateFormatReader();
+  const ancestorLabels = new WeakMap<Element, string>();
+
+  // Each kind of field is queried right before its phase: answers to earlier fields can
+  // re-render the form or reveal follow-up questions.
 
   // Text inputs + textareas (unified with retry logic)
   const textInputs = document.querySelectorAll<HTMLInputElement | HTMLTextAreaElement>(
@@ -686,7 +774,7 @@ async function handleQuestionnaire(): Promise<{ needsUserInput: boolean; fieldLa
     const hasInvalidValue = inp.getAttribute('aria-invalid') === 'true' && inp.value.trim();
     if (inp.value.trim() && !hasInvalidValue) continue;
 
-    const label = getLabelForInput(inp);
+    const label = getLabelForInput(inp, ancestorLabels);
     if (!label) continue;
 
     // If field has an invalid value, clear it first and set initial error context
@@ -703,17 +791,16 @@ async function handleQuestionnaire(): Promise<{ needsUserInput: boolean; fieldLa
 
     // Detect if this is actually a date field (Indeed uses type="text" for dates)
     const isDateField = constraints.type === 'date'
-      || !!constraints.placeholder?.match(/[DMY]{2,4}/i)
-      || !!(inp.getAttribute('aria-label') || '').match(/dat[ae]/i)
-      || !!label.match(/\b(data|date|when|quando|início|start|término|end|from|until|até)\b/i);
+      || DATE_HINT_RE.test(constraints.placeholder || '')
+      || DATE_ARIA_RE.test(inp.getAttribute('aria-label') || '')
+      || DATE_LABEL_RE.test(label);
 
     // If we detected it's a date but have no format hint, check error messages on page
-    if (isDateField && !constraints.placeholder?.match(/[DMY]{2,4}/i)) {
-      const pageText = document.body?.innerText || '';
-      const formatMatch = pageText.match(/(DD\/MM\/YYYY|MM\/DD\/YYYY|YYYY-MM-DD)/i);
-      if (formatMatch) {
-        constraints.placeholder = formatMatch[1];
-        log(`📅 Detected date format from page text: ${formatMatch[1]}`);
+    if (isDateField && !DATE_HINT_RE.test(constraints.placeholder || '')) {
+      const formatFromPage = pageDateFormat();
+      if (formatFromPage) {
+        constraints.placeholder = formatFromPage;
+        log(`📅 Detected date format from page text: ${formatFromPage}`);
       } else {
         // Default to DD/MM/YYYY for br.indeed.com
         const isBrazil = window.location.hostname.includes('br.indeed');
@@ -725,10 +812,7 @@ async function handleQuestionnaire(): Promise<{ needsUserInput: boolean; fieldLa
     // Enrich the question with format/type hints so AI knows what to produce
     let enrichedLabel = label;
     if (isDateField && constraints.placeholder) {
-      enrichedLabel = `${label} (MUST answer in exact format: ${constraints.placeholder}, example: ${
-        constraints.placeholder === 'DD/MM/YYYY' ? '15/03/2024' :
-        constraints.placeholder === 'MM/DD/YYYY' ? '03/15/2024' : '2024-03-15'
-      })`;
+      enrichedLabel = `${label} (MUST answer in exact format: ${constraints.placeholder}, example: ${dateExample(constraints.placeholder)})`;
     } else if (constraints.placeholder) {
       if (!label.toLowerCase().includes(constraints.placeholder.toLowerCase())) {
         enrichedLabel = `${label} (${constraints.placeholder})`;
@@ -828,39 +912,17 @@ async function handleQuestionnaire(): Promise<{ needsUserInput: boolean; fieldLa
     const needsFilling = !sel.value || sel.getAttribute('aria-invalid') === 'true';
     if (!needsFilling) continue;
 
-    const label = getLabelForInput(sel);
+    const label = getLabelForInput(sel, ancestorLabels);
     if (!label) continue;
 
-    const opts = Array.from(sel.querySelectorAll('option'));
-    const optionTexts: string[] = [];
-    const optionValues: string[] = [];
-
-    for (const opt of opts) {
-      const val = opt.value;
-      const text = opt.textContent?.trim() || '';
-      if (val) {
-        optionTexts.push(text);
-        optionValues.push(val);
-      }
-    }
+    const { texts: optionTexts, values: optionValues } = readSelectOptions(sel);
 
     log(`📝 Select: "${label}" [options: ${optionTexts.join(', ')}]`);
 
     if (optionTexts.length > 0) {
       const answer = await askClaude(label, optionTexts);
       if (answer) {
-        // Exact match first, then case-insensitive, then partial match
-        let idx = optionTexts.indexOf(answer);
-        if (idx < 0) {
-          const lower = answer.toLowerCase().trim();
-          idx = optionTexts.findIndex(t => t.toLowerCase().trim() === lower);
-        }
-        if (idx < 0) {
-          const lower = answer.toLowerCase().trim();
-          idx = optionTexts.findIndex(t =>
-            t.toLowerCase().trim().includes(lower) || lower.includes(t.toLowerCase().trim())
-          );
-        }
+        const idx = matchOptionIndex(answer, optionTexts);
         if (idx >= 0) {
           selectOption(sel, optionValues[idx]);
           log(`✅ Selected: "${optionTexts[idx]}" for "${label}"`);
@@ -880,21 +942,14 @@ async function handleQuestionnaire(): Promise<{ needsUserInput: boolean; fieldLa
   }
 
   // Radio buttons
-  const radioGroups = new Map<string, HTMLInputElement[]>();
-  const radios = document.querySelectorAll<HTMLInputElement>('input[type="radio"]');
-  for (const radio of radios) {
-    if (!isVisible(radio)) continue;
-    const name = radio.name;
-    if (!name) continue;
-    if (!radioGroups.has(name)) radioGroups.set(name, []);
-    radioGroups.get(name)!.push(radio);
-  }
+  for (const [name, radios] of collectRadioGroups()) {
+    // Read when the group is reached: answering earlier groups can check this one
+    if (radios.some(r => r.checked)) continue;
+    const groupRadios = radios.filter(r => isVisible(r));
+    if (groupRadios.length === 0) continue;
 
-  for (const [name, groupRadios] of radioGroups) {
-    const checked = document.querySelector<HTMLInputElement>(`input[name="${name}"]:checked`);
-    if (checked) continue;
-
-    const optionLabels = groupRadios.map(r => getLabelForInput(r));
+    const optionLabels = groupRadios.map(r => getLabelForInput(r, ancestorLabels));
+    const optionLabelSet = new Set(optionLabels);
 
     let groupLabel = '';
     try {
@@ -912,7 +967,7 @@ async function handleQuestionnaire(): Promise<{ needsUserInput: boolean; fieldLa
         for (const lbl of allLabels) {
           const text = lbl.textContent?.trim() || '';
           // Skip if it's one of the radio option labels
-          if (optionLabels.includes(text)) continue;
+          if (optionLabelSet.has(text)) continue;
           if (text.length > 5 && text.length < 500) {
             groupLabel = text;
             break;
@@ -1008,6 +1063,8 @@ function detectPageErrors(): string[] {
  */
 async function handlePostClickErrors(pageErrors: string[]): Promise<'fixed' | 'failed'> {
   let anyFixed = false;
+  const pageDateFormat = pageDateFormatReader();
+  const ancestorLabels = new WeakMap<Element, string>();
 
   // Find inputs with validation errors
   const allInputs = document.querySelectorAll<HTMLInputElement | HTMLTextAreaElement>(
@@ -1020,7 +1077,7 @@ async function handlePostClickErrors(pageErrors: string[]): Promise<'fixed' | 'f
     const domError = detectValidationError(inp);
     if (!domError) continue;
 
-    const label = getLabelForInput(inp);
+    const label = getLabelForInput(inp, ancestorLabels);
     if (!label) continue;
 
     const constraints = getInputConstraints(inp);
@@ -1028,19 +1085,17 @@ async function handlePostClickErrors(pageErrors: string[]): Promise<'fixed' | 'f
 
     // Detect date fields and extract format from error message or page
     const isDateField = constraints.type === 'date'
-      || !!constraints.placeholder?.match(/[DMY]{2,4}/i)
-      || !!domError.match(/[DMY]{2,4}/i)
-      || !!label.match(/\b(data|date|when|quando|início|start|término|end)\b/i);
+      || DATE_HINT_RE.test(constraints.placeholder || '')
+      || DATE_HINT_RE.test(domError)
+      || DATE_LABEL_RE.test(label);
 
     if (isDateField) {
       // Extract format from error message (e.g. "Insira as datas no formato DD/MM/YYYY")
-      const formatFromError = domError.match(/(DD\/MM\/YYYY|MM\/DD\/YYYY|YYYY-MM-DD)/i);
+      const formatFromError = domError.match(DATE_FORMAT_RE);
       if (formatFromError) {
         constraints.placeholder = formatFromError[1];
-      } else if (!constraints.placeholder?.match(/[DMY]{2,4}/i)) {
-        const pageText = document.body?.innerText || '';
-        const formatFromPage = pageText.match(/(DD\/MM\/YYYY|MM\/DD\/YYYY|YYYY-MM-DD)/i);
-        constraints.placeholder = formatFromPage?.[1] || 'DD/MM/YYYY';
+      } else if (!DATE_HINT_RE.test(constraints.placeholder || '')) {
+        constraints.placeholder = pageDateFormat() || 'DD/MM/YYYY';
       }
       constraints.type = 'date';
     }
@@ -1048,9 +1103,7 @@ async function handlePostClickErrors(pageErrors: string[]): Promise<'fixed' | 'f
     // Enrich label with format hints for retry
     let enrichedLabel = label;
     if (isDateField && constraints.placeholder) {
-      const example = constraints.placeholder === 'DD/MM/YYYY' ? '15/03/2024' :
-        constraints.placeholder === 'MM/DD/YYYY' ? '03/15/2024' : '2024-03-15';
-      enrichedLabel = `${label} (MUST answer in exact format: ${constraints.placeholder}, example: ${example})`;
+      enrichedLabel = `${label} (MUST answer in exact format: ${constraints.placeholder}, example: ${dateExample(constraints.placeholder)})`;
     } else if (constraints.type === 'number') {
       enrichedLabel = `${label} (answer must be a number only)`;
     } else if (constraints.type === 'tel') {
@@ -1091,7 +1144,7 @@ async function handlePostClickErrors(pageErrors: string[]): Promise<'fixed' | 'f
     const isRequired = inp.required || inp.getAttribute('aria-required') === 'true';
     if (!isRequired) continue;
 
-    const label = getLabelForInput(inp);
+    const label = getLabelForInput(inp, ancestorLabels);
     if (!label) continue;
 
     const constraints = getInputConstraints(inp);
@@ -1107,23 +1160,16 @@ async function handlePostClickErrors(pageErrors: string[]): Promise<'fixed' | 'f
   }
 
   // Fix selects with aria-invalid or empty required value
-  const allSelects = document.querySelectorAll<HTMLSelectElement>('select');
+  // Copied out of the live tag collection, so selects re-rendered by an answer don't shift it
+  const allSelects = Array.from(document.getElementsByTagName('select'));
   for (const sel of allSelects) {
     const hasError = sel.getAttribute('aria-invalid') === 'true' || (!sel.value && sel.required);
     if (!hasError) continue;
 
-    const label = getLabelForInput(sel);
+    const label = getLabelForInput(sel, ancestorLabels);
     if (!label) continue;
 
-    const opts = Array.from(sel.querySelectorAll('option'));
-    const optionTexts: string[] = [];
-    const optionValues: string[] = [];
-    for (const opt of opts) {
-      if (opt.value) {
-        optionTexts.push(opt.textContent?.trim() || '');
-        optionValues.push(opt.value);
-      }
-    }
+    const { texts: optionTexts, values: optionValues } = readSelectOptions(sel);
 
     if (optionTexts.length === 0) continue;
 
@@ -1134,17 +1180,7 @@ async function handlePostClickErrors(pageErrors: string[]): Promise<'fixed' | 'f
       `This select field has error: "Escolha uma opção para continuar". Page errors: ${pageErrors.join('; ')}. Pick the correct option.`
     );
     if (answer) {
-      let idx = optionTexts.indexOf(answer);
-      if (idx < 0) {
-        const lower = answer.toLowerCase().trim();
-        idx = optionTexts.findIndex(t => t.toLowerCase().trim() === lower);
-      }
-      if (idx < 0) {
-        const lower = answer.toLowerCase().trim();
-        idx = optionTexts.findIndex(t =>
-          t.toLowerCase().trim().includes(lower) || lower.includes(t.toLowerCase().trim())
-        );
-      }
+      const idx = matchOptionIndex(answer, optionTexts);
       if (idx >= 0) {
         selectOption(sel, optionValues[idx]);
         log(`🔧 Fixed select "${label}" with: "${optionTexts[idx]}"`);
@@ -1275,42 +1311,52 @@ function waitForPostClickErrors(timeoutMs: number): Promise<string[]> {
 
 // ── Wizard Navigation ──
 
+interface ButtonCandidate {
+  btn: Element;
+  /** Trimmed text — what gets matched and logged. */
+  text: string;
+}
+
 function clickContinueOrSubmit(): 'submitted' | 'continued' | 'none' {
   // Log all visible buttons for debugging
-  const allBtns = findAll('button', document).filter(isVisible);
-  const btnTexts = allBtns.map(b => (b.textContent || '').trim().substring(0, 40));
-  log(`Buttons on page: [${btnTexts.join(', ')}]`);
+  const allBtns = Array.from(document.getElementsByTagName('button')).filter(isVisible);
+  const btnTexts = allBtns.map(b => (b.textContent || '').trim());
+  log(`Buttons on page: [${btnTexts.map(t => t.substring(0, 40)).join(', ')}]`);
 
   if (clickFirst(SUBMIT_SELECTORS)) { log('Clicked SUBMIT via selector'); return 'submitted'; }
   if (clickFirst(CONTINUE_SELECTORS)) { log('Clicked CONTINUE via selector'); return 'continued'; }
 
-  for (const btn of allBtns) {
-    const text = (btn.textContent || '').toLowerCase().trim();
-    if (SKIP_KEYWORDS.some(kw => text.includes(kw))) continue;
-    if (SUBMIT_KEYWORDS.some(kw => text.includes(kw))) {
-      log(`Clicked SUBMIT button: "${text}"`);
-      (btn as HTMLElement).click();
-      return 'submitted';
+  // One pass over the buttons: remember the first submit, continue and fallback
+  // candidates, then click by priority
+  let submitBtn: ButtonCandidate | null = null;
+  let continueBtn: ButtonCandidate | null = null;
+  let fallbackBtn: ButtonCandidate | null = null;
+  for (let i = 0; i < allBtns.length && !submitBtn; i++) {
+    const btn = allBtns[i];
+    const text = btnTexts[i];
+    if (SKIP_RE.test(text)) continue;
+    if (SUBMIT_RE.test(text)) {
+      submitBtn = { btn, text };
+    } else if (!continueBtn && CONTINUE_RE.test(text)) {
+      continueBtn = { btn, text };
+    } else if (!fallbackBtn && text && text.length <= 50 && !isDisabled(btn)) {
+      fallbackBtn = { btn, text };
     }
   }
 
-  for (const btn of allBtns) {
-    const text = (btn.textContent || '').toLowerCase().trim();
-    if (SKIP_KEYWORDS.some(kw => text.includes(kw))) continue;
-    if (CONTINUE_KEYWORDS.some(kw => text.includes(kw))) {
-      log(`Clicked CONTINUE button: "${text}"`);
-      (btn as HTMLElement).click();
-      return 'continued';
-    }
+  if (submitBtn) {
+    log(`Clicked SUBMIT button: "${submitBtn.text}"`);
+    (submitBtn.btn as HTMLElement).click();
+    return 'submitted';
   }
-
-  for (const btn of allBtns) {
-    const text = (btn.textContent || '').toLowerCase().trim();
-    if (SKIP_KEYWORDS.some(kw => text.includes(kw))) continue;
-    if (!text || text.length > 50) continue;
-    if (isDisabled(btn)) continue;
-    log(`Clicked FALLBACK button: "${text}"`);
-    (btn as HTMLElement).click();
+  if (continueBtn) {
+    log(`Clicked CONTINUE button: "${continueBtn.text}"`);
+    (continueBtn.btn as HTMLElement).click();
+    return 'continued';
+  }
+  if (fallbackBtn) {
+    log(`Clicked FALLBACK button: "${fallbackBtn.text}"`);
+    (fallbackBtn.btn as HTMLElement).click();
     return 'continued';
   }
 
@@ -1320,44 +1366,72 @@ function clickContinueOrSubmit(): 'submitted' | 'continued' | 'none' {
 
 // ── Cover Letter Detection ──
 
+/** Every marker of a dedicated cover letter field, folded into one query. */
+const COVER_LETTER_FIELD_SELECTOR = [
+  '[data-testid="CoverLetterInput"]',
+  '[data-testid*="coverLetter" i]',
+  '[data-testid*="cover-letter" i]',
+  '[class*="CoverLetter"]',
+  '[class*="cover-letter"]',
+  'input[type="file"][name*="cover" i]',
+  'input[type="file"][aria-label*="cover" i]',
+  'input[type="file"][aria-label*="carta" i]',
+].join(', ');
+
 function hasCoverLetterField(): boolean {
-  const selectors = [
-    '[data-testid="CoverLetterInput"]',
-    '[data-testid*="coverLetter" i]',
-    '[data-testid*="cover-letter" i]',
-    '[class*="CoverLetter"]',
-    '[class*="cover-letter"]',
-    'input[type="file"][name*="cover" i]',
-    'input[type="file"][aria-label*="cover" i]',
-    'input[type="file"][aria-label*="carta" i]',
-  ];
-  for (const sel of selectors) {
-    if (document.querySelector(sel)) return true;
-  }
-  const keywords = ['cover letter', 'carta de apresentação', 'carta de apresentacao'];
-  const textEls = document.querySelectorAll('label, span, h3, button, a');
-  for (const el of textEls) {
-    const text = (el.textContent || '').toLowerCase();
-    if (keywords.some(kw => text.includes(kw))) return true;
+  if (document.querySelector(COVER_LETTER_FIELD_SELECTOR)) return true;
+  for (const el of document.querySelectorAll('label, span, h3, button, a')) {
+    if (COVER_LETTER_TEXT_RE.test(el.textContent || '')) return true;
   }
   return false;
 }
 
+// ── Job Documents ──
+
+interface JobPdfs {
+  jobKey?: string;
+  cv?: ArrayBuffer;
+  cvOnly?: ArrayBuffer;
+  cover?: ArrayBuffer;
+}
+
+/** Decoded PDFs of the current job; every wizard step resends the same documents. */
+let jobPdfs: JobPdfs | null = null;
+
+/**
+ * Decode the base64 PDFs of a FILL_AND_ADVANCE payload (Chrome message passing
+ * doesn't support ArrayBuffer), reusing the previous step's buffers for the same job.
+ */
+function decodeJobPdfs(payload: any): JobPdfs {
+  const { jobKey, cvData, cvOnlyData, coverData } = payload;
+  if (jobKey && jobPdfs?.jobKey === jobKey) return jobPdfs;
+  jobPdfs = {
+    jobKey,
+    cv: cvData ? base64ToBuffer(cvData) : undefined,
+    cvOnly: cvOnlyData ? base64ToBuffer(cvOnlyData) : undefined,
+    cover: coverData ? base64ToBuffer(coverData) : undefined,
+  };
+  return jobPdfs;
+}
+
 // ── Message Listener ──
 
 chrome.runtime.onMessage.addListener((message: Message, _sender, sendResponse) => {
   switch (message.type) {
     case 'FILL_AND_ADVANCE': {
-      const { cvData, cvOnlyData, cvFilename, coverData, coverFilename, jobTitle, baseProfile } = message.payload || {};
+      const { cvFilename, coverFilename, jobTitle, baseProfile } = message.payload || {};
       currentJobTitle = jobTitle || '';
       currentBaseProfile = baseProfile || '';
 
-      // Reconstruct ArrayBuffers from number[] (Chrome message passing doesn't support ArrayBuffer)
       // cvBuffer = CV with cover letter embedded (fallback when no cover field)
       // cvOnlyBuffer = CV without cover letter (used when cover has its own field)
-      const cvBuffer = cvData ? new Uint8Array(cvData).buffer : undefined;
-      const cvOnlyBuffer = cvOnlyData ? new Uint8Array(cvOnlyData).buffer : undefined;
-      const coverBuffer = coverData ? new Uint8Array(coverData).buffer : undefined;
+      const { cv: cvBuffer, cvOnly: cvOnlyBuffer, cover: coverBuffer } = decodeJobPdfs(message.payload || {});
+
+      // Flush the step's log lines first so they precede the orchestrator's step summary
+      const respond = (response: Message): void => {
+        flushLogs();
+        sendResponse(response);
+      };
 
       (async () => {
         try {
@@ -1369,7 +1443,7 @@ chrome.runtime.onMessage.addListener((message: Message, _sender, sendResponse) =
           const specialHandled = await handleSpecialPages();
           if (specialHandled) {
             log('Special page handled, continuing');
-            sendResponse({ type: 'STEP_RESULT', payload: { action: 'continued' } });
+            respond({ type: 'STEP_RESULT', payload: { action: 'continued' } });
             return;
           }
 
@@ -1412,20 +1486,21 @@ chrome.runtime.onMessage.addListener((message: Message, _sender, sendResponse) =
           if (hasCoverLetterField()) {
             log('Cover letter field detected, handling...');
             await handleCoverLetter(coverBuffer, coverFilename);
-            await waitMs(300);
+            await waitForDomSettle(document, SETTLE_QUIET_MS, 300);
           }
 
           const result = await handleQuestionnaire();
           if (result.needsUserInput) {
             log(`Questionnaire needs input: ${result.fieldLabel}`, 'warning');
-            sendResponse({
+            respond({
               type: 'STEP_RESULT',
               payload: { action: 'needs_input', fieldLabel: result.fieldLabel },
             });
             return;
           }
 
-          await waitMs(500);
+          // Let the form re-render from the answers; no fixed wait when it already has
+          await waitForDomSettle(document, SETTLE_QUIET_MS, 500);
 
           // Snapshot DOM state before clicking to detect if page changed
           const urlBefore = window.location.href;
@@ -1451,7 +1526,7 @@ chrome.runtime.onMessage.addListener((message: Message, _sender, sendResponse) =
 
               const fixResult = await handlePostClickErrors(errorsDetected);
               if (fixResult === 'fixed') {
-                await waitMs(500);
+                await waitForDomSettle(document, SETTLE_QUIET_MS, 500);
                 navResult = clickContinueOrSubmit();
                 log(`Retry navigation after fix: ${navResult}`);
 
@@ -1478,7 +1553,7 @@ chrome.runtime.onMessage.addListener((message: Message, _sender, sendResponse) =
                   log(`⚠️ Form errors found in final scan: ${pageErrors.join(' | ')}`, 'warning');
                   const fixResult = await handlePostClickErrors(pageErrors);
                   if (fixResult === 'fixed') {
-                    await waitMs(500);
+                    await waitForDomSettle(document, SETTLE_QUIET_MS, 500);
                     navResult = clickContinueOrSubmit();
                     log(`Retry navigation after final fix: ${navResult}`);
                   }
@@ -1487,10 +1562,10 @@ chrome.runtime.onMessage.addListener((message: Message, _sender, sendResponse) =
             }
           }
 
-          sendResponse({ type: 'STEP_RESULT', payload: { action: navResult } });
+          respond({ type: 'STEP_RESULT', payload: { action: navResult } });
         } catch (err) {
           log(`FILL_AND_ADVANCE ERROR: ${err}`, 'error');
-          sendResponse({
+          respond({
             type: 'STEP_RESULT',
             payload: { action: 'needs_input', fieldLabel: `Internal error: ${err}` },
           });
@@ -1501,16 +1576,25 @@ chrome.runtime.onMessage.addListener((message: Message, _sender, sendResponse) =
     }
 
     case 'WIZARD_READY': {
-      const buttons = document.querySelectorAll('button');
-      const inputs = document.querySelectorAll('input');
-      sendResponse({
-        type: 'STATUS_UPDATE',
-        payload: {
-          ready: buttons.length > 0 || inputs.length > 0,
-          buttons: buttons.length,
-          inputs: inputs.length,
-          url: window.location.href,
-        },
+      // Every smartapply frame gets this message and the first reply wins. The
+      // wizard frame replies as soon as its controls render; a frame without any
+      // only answers "not ready" once the wait runs out.
+      waitForSelector(WIZARD_CONTROL_SELECTOR, document, WIZARD_READY_WAIT_MS).then(() => {
+        let buttons = 0;
+        let inputs = 0;
+        for (const el of document.querySelectorAll(WIZARD_CONTROL_SELECTOR)) {
+          if (el.tagName === 'BUTTON') buttons++;
+          else inputs++;
+        }
+        sendResponse({
+          type: 'STATUS_UPDATE',
+          payload: {
+            ready: buttons > 0 || inputs > 0,
+            buttons,
+            inputs,
+            url: window.location.href,
+          },
+        });
       });
       break;
     }
@@ -5,74 +5,121 @@
  */
 
 import { CacheEntry } from '../types';
+import { DebouncedStore } from './debounced-store';
 
 const STORAGE_KEY = 'answerCache';
 
-const STOP_WORDS = new Set([
-  'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+/**
+ * Words ignored when matching questions. Tokens are always two or more characters,
+ * so single-letter words (a, o, e) never reach this set and are left out.
+ */
+const STOP_WORDS: ReadonlySet<string> = new Set([
+  // English
+  'an', 'the', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
   'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
   'should', 'may', 'might', 'shall', 'can', 'to', 'of', 'in', 'for',
   'on', 'with', 'at', 'by', 'from', 'as', 'into', 'about', 'between',
   'through', 'after', 'before', 'above', 'below', 'and', 'or', 'but',
   'not', 'no', 'if', 'then', 'than', 'that', 'this', 'these', 'those',
-  'it', 'its', 'you', 'your', 'we', 'our', 'um', 'uma', 'o', 'os',
-  'as', 'de', 'do', 'da', 'dos', 'das', 'em', 'no', 'na', 'nos',
-  'nas', 'por', 'para', 'com', 'sem', 'e', 'ou', 'mas', 'se',
+  'it', 'its', 'you', 'your', 'we', 'our',
+  // Portuguese
+  'um', 'uma', 'os', 'de', 'da', 'dos', 'das', 'em', 'na', 'nos',
+  'nas', 'por', 'para', 'com', 'sem', 'ou', 'mas', 'se',
 ]);
 
-function tokenize(text: string): Set<string> {
-  const tokens = new Set<string>();
-  for (const word of text.toLowerCase().split(/\s+/)) {
-    const clean = word.replace(/[^a-zA-Z0-9àáâãéêíóôõúüçñ]/g, '');
-    if (clean && clean.length > 1 && !STOP_WORDS.has(clean)) {
-      tokens.add(clean);
-    }
-  }
-  return tokens;
+/** Anything that is neither whitespace nor a token character (accented PT/ES/FR letters kept). */
+const NON_TOKEN_CHARS_RE = /[^\sa-z0-9àáâãéêíóôõúüçñ]/g;
+
+/** Words of two or more characters once the non-token characters are gone. */
+const TOKEN_RE = /\S{2,}/g;
+
+/** Distinct content tokens of a label, sorted so similarity can merge-join them. */
+function tokenize(text: string): string[] {
+  const words = text.toLowerCase().replace(NON_TOKEN_CHARS_RE, '').match(TOKEN_RE) || [];
+  return sortedTokens(words.filter(word => !STOP_WORDS.has(word)));
+}
+
+function sortedTokens(tokens: Iterable<string>): string[] {
+  return Array.from(new Set(tokens)).sort();
 }
 
-function similarity(a: Set<string>, b: Set<string>): number {
-  if (a.size === 0 || b.size === 0) return 0;
+/** Jaccard similarity of two sorted, duplicate-free token arrays (single merge pass). */
+function similarity(a: string[], b: string[]): number {
+  if (a.length === 0 || b.length === 0) return 0;
   let intersection = 0;
-  for (const t of a) {
-    if (b.has(t)) intersection++;
+  let i = 0;
+  let j = 0;
+  while (i < a.length && j < b.length) {
+    if (a[i] === b[j]) {
+      intersection++;
+      i++;
+      j++;
+    } else if (a[i] < b[j]) {
+      i++;
+    } else {
+      j++;
+    }
   }
-  const union = a.size + b.size - intersection;
+  const union = a.length + b.length - intersection;
   return intersection / union;
 }
 
 /** Levenshtein distance ratio (replaces Python's SequenceMatcher). */
 function editDistanceRatio(a: string, b: string): number {
+  // Keep the shorter string on the inner axis so the rows stay small
+  if (a.length < b.length) [a, b] = [b, a];
   const m = a.length;
   const n = b.length;
   if (m === 0 && n === 0) return 1;
   if (m === 0 || n === 0) return 0;
 
-  const dp: number[][] = Array.from({ length: m + 1 }, () => Array(n + 1).fill(0));
-  for (let i = 0; i <= m; i++) dp[i][0] = i;
-  for (let j = 0; j <= n; j++) dp[0][j] = j;
+  // Two rolling rows instead of the full (m+1)×(n+1) matrix
+  let prev = new Uint32Array(n + 1);
+  let curr = new Uint32Array(n + 1);
+  for (let j = 0; j <= n; j++) prev[j] = j;
 
   for (let i = 1; i <= m; i++) {
+    curr[0] = i;
+    const ca = a.charCodeAt(i - 1);
     for (let j = 1; j <= n; j++) {
-      const cost = a[i - 1] === b[j - 1] ? 0 : 1;
-      dp[i][j] = Math.min(dp[i - 1][j] + 1, dp[i][j - 1] + 1, dp[i - 1][j - 1] + cost);
+      const cost = ca === b.charCodeAt(j - 1) ? 0 : 1;
+      curr[j] = Math.min(prev[j] + 1, curr[j - 1] + 1, prev[j - 1] + cost);
     }
+    [prev, curr] = [curr, prev];
   }
 
-  return 1 - dp[m][n] / Math.max(m, n);
+  return 1 - prev[n] / m;
+}
+
+const WORD_CHAR_RE = /[\p{L}\p{N}]/u;
+
+/** `text` starts with `prefix` as whole words: "no" → "no, never", but not "none". */
+function startsWithWords(text: string, prefix: string): boolean {
+  return !!prefix && text.startsWith(prefix)
+    && (text.length === prefix.length || !WORD_CHAR_RE.test(text[prefix.length]));
 }
 
 function bestOptionMatch(answer: string, options: string[]): string | null {
   if (options.length === 0) return null;
-  let bestScore = 0;
-  let bestOption = options[0];
   const aLower = answer.toLowerCase();
+  const optLowers = options.map(opt => opt.toLowerCase());
 
-  for (const opt of options) {
-    const score = editDistanceRatio(aLower, opt.toLowerCase());
+  // Most cached answers hit an option exactly or as its leading words ("Yes" → "Yes, I agree"),
+  // so try those before paying for edit distance. A prefix only counts when a single option
+  // has it; otherwise every option is scored.
+  const exact = optLowers.indexOf(aLower);
+  if (exact !== -1) return options[exact];
+  const prefixed = optLowers.flatMap((opt, i) =>
+    startsWithWords(opt, aLower) || startsWithWords(aLower, opt) ? [i] : []);
+  if (prefixed.length === 1) return options[prefixed[0]];
+
+  let bestScore = 0;
+  let bestOption = options[0];
+  for (let i = 0; i < options.length; i++) {
+    const score = editDistanceRatio(aLower, optLowers[i]);
     if (score > bestScore) {
       bestScore = score;
-      bestOption = opt;
+      bestOption = options[i];
     }
   }
 
@@ -81,34 +128,74 @@ function bestOptionMatch(answer: string, options: string[]): string | null {
 
 export class AnswerCache {
   private entries: CacheEntry[] = [];
-  private loaded = false;
+  /** Sorted tokens per entry, index-aligned with `entries` (older stored entries may be unsorted). */
+  private tokenLists: string[][] = [];
+  /** token → indices of entries containing it, so only overlapping entries get scored. */
+  private postings = new Map<string, number[]>();
+  /** Built once per service worker; overlapping lookups/stores share the same read. */
+  private loading: Promise<void> | null = null;
+  /** Answers are stored several times per wizard step; write them in batches. */
+  private writer = new DebouncedStore(STORAGE_KEY, () => this.entries);
+
+  load(): Promise<void> {
+    if (!this.loading) {
+      this.loading = this.read().catch(err => {
+        this.loading = null;
+        throw err;
+      });
+    }
+    return this.loading;
+  }
 
-  async load(): Promise<void> {
-    if (this.loaded) return;
+  private async read(): Promise<void> {
     const data = await chrome.storage.local.get(STORAGE_KEY);
     this.entries = data[STORAGE_KEY] || [];
-    this.loaded = true;
+    this.tokenLists = this.entries.map(entry => sortedTokens(entry.tokens));
+    this.postings = new Map();
+    this.tokenLists.forEach((tokens, index) => this.index(tokens, index));
+  }
+
+  private index(tokens: string[], entryIndex: number): void {
+    for (const token of tokens) {
+      const list = this.postings.get(token);
+      if (list) list.push(entryIndex);
+      else this.postings.set(token, [entryIndex]);
+    }
+  }
+
+  /** Entries of the given input type sharing at least one token, in insertion order. */
+  private candidates(tokens: string[], inputType: string): number[] {
+    const found = new Set<number>();
+    for (const token of tokens) {
+      for (const i of this.postings.get(token) || []) {
+        if (this.entries[i].inputType === inputType) found.add(i);
+      }
+    }
+    return Array.from(found).sort((a, b) => a - b);
+  }
+
+  private save(): void {
+    this.writer.schedule();
   }
 
-  private async save(): Promise<void> {
-    await chrome.storage.local.set({ [STORAGE_KEY]: this.entries });
+  /** Persist any pending changes immediately (call when the bot stops). */
+  flush(): Promise<void> {
+    return this.writer.flush();
   }
 
   async store(label: string, inputType: string, answer: string, options?: string[]): Promise<void> {
     await this.load();
-    const tokens = Array.from(tokenize(label));
+    const tokens = tokenize(label);
     if (tokens.length === 0) return;
 
     // Update existing entry if very similar question exists
-    for (const entry of this.entries) {
-      if (entry.inputType === inputType) {
-        const existingTokens = new Set(entry.tokens);
-        if (similarity(new Set(tokens), existingTokens) > 0.85) {
-          entry.answer = answer;
-          if (options) entry.options = options;
-          await this.save();
-          return;
-        }
+    for (const i of this.candidates(tokens, inputType)) {
+      const entry = this.entries[i];
+      if (similarity(tokens, this.tokenLists[i]) > 0.85) {
+        entry.answer = answer;
+        if (options) entry.options = options;
+        this.save();
+        return;
       }
     }
 
@@ -119,20 +206,26 @@ export class AnswerCache {
       answer,
       options: options || [],
     });
-    await this.save();
+    this.tokenLists.push(tokens);
+    this.index(tokens, this.entries.length - 1);
+    this.save();
   }
 
   async lookup(label: string, inputType: string, options?: string[], threshold = 0.5): Promise<string | null> {
     await this.load();
     const queryTokens = tokenize(label);
-    if (queryTokens.size === 0) return null;
+    if (queryTokens.length === 0) return null;
 
     let bestScore = 0;
     let bestEntry: CacheEntry | null = null;
 
-    for (const entry of this.entries) {
-      if (entry.inputType !== inputType) continue;
-      const score = similarity(queryTokens, new Set(entry.tokens));
+    for (const i of this.candidates(queryTokens, inputType)) {
+      const entryTokens = this.tokenLists[i];
+      // Jaccard can't exceed the size ratio — skip entries that can't beat the best so far
+      const sizeBound = Math.min(queryTokens.length, entryTokens.length) / Math.max(queryTokens.length, entryTokens.length);
+      if (sizeBound <= bestScore) continue;
+      const entry = this.entries[i];
+      const score = similarity(queryTokens, entryTokens);
       if (score > bestScore) {
         bestScore = score;
         bestEntry = entry;
@@ -28,6 +28,24 @@ interface BackendTailorRequest {
   baseCoverLetter: string;
 }
 
+/** How long the start-up health check waits for the backend. */
+const HEALTH_TIMEOUT_MS = 3000;
+
+/** True if the backend answers its /health endpoint in time. */
+export async function isBackendReachable(backendUrl: string): Promise<boolean> {
+  if (!backendUrl) return false;
+  const controller = new AbortController();
+  const timer = setTimeout(() => controller.abort(), HEALTH_TIMEOUT_MS);
+  try {
+    const response = await fetch(`${backendUrl}/health`, { signal: controller.signal });
+    return response.ok;
+  } catch {
+    return false;
+  } finally {
+    clearTimeout(timer);
+  }
+}
+
 /**
  * Ask backend for an answer to a questionnaire field.
  */
@@ -118,21 +136,27 @@ export async function generateTailoredContent(
   return response.json();
 }
 
+/** One document for generatePdfsFromHtml; `filename` also saves a copy on the backend. */
+export interface PdfDocument {
+  html: string;
+  filename?: string;
+}
+
 /**
- * Convert HTML to PDF via backend (Playwright).
- * Returns the PDF as an ArrayBuffer.
+ * Convert several HTML documents to PDF via backend (Playwright) in one request,
+ * rendered in a shared browser context.
+ * Returns the PDFs as ArrayBuffers, in the order given.
  */
-export async function generatePdfFromHtml(
-  html: string,
-  backendUrl: string,
-  filename?: string
-): Promise<ArrayBuffer> {
+export async function generatePdfsFromHtml(
+  documents: PdfDocument[],
+  backendUrl: string
+): Promise<ArrayBuffer[]> {
   if (!backendUrl) throw new Error('Backend URL not configured');
 
-  const response = await fetch(`${backendUrl}/api/generate-pdf`, {
+  const response = await fetch(`${backendUrl}/api/generate-pdfs`, {
     method: 'POST',
     headers: { 'Content-Type': 'application/json' },
-    body: JSON.stringify({ html, filename }),
+    body: JSON.stringify({ items: documents }),
   });
 
   if (!response.ok) {
@@ -140,5 +164,12 @@ export async function generatePdfFromHtml(
     throw new Error(`PDF generation error (${response.status}): ${err}`);
   }
 
-  return response.arrayBuffer();
+  // The PDFs arrive back to back; X-Pdf-Sizes holds each one's byte length
+  const body = await response.arrayBuffer();
+  const sizes = (response.headers.get('X-Pdf-Sizes') || '').split(',').map(Number);
+  if (sizes.length !== documents.length || sizes.some(n => !Number.isInteger(n))) {
+    throw new Error('PDF generation error: malformed batch response');
+  }
+  let offset = 0;
+  return sizes.map(size => body.slice(offset, (offset += size)));
 }
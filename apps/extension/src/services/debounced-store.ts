@@ -0,0 +1,30 @@
+/**
+ * Debounced chrome.storage.local writer.
+ * Coalesces bursts of mutations into a single write of the latest snapshot.
+ */
+
+export class DebouncedStore<T> {
+  private timer: ReturnType<typeof setTimeout> | null = null;
+
+  constructor(
+    private readonly key: string,
+    private readonly snapshot: () => T,
+    private readonly delayMs = 1000,
+  ) {}
+
+  /** Mark the data dirty; it is written once no new changes arrive for `delayMs`. */
+  schedule(): void {
+    if (this.timer !== null) clearTimeout(this.timer);
+    this.timer = setTimeout(() => {
+      this.flush().catch(() => {});
+    }, this.delayMs);
+  }
+
+  /** Write pending changes now (no-op when nothing is pending). */
+  async flush(): Promise<void> {
+    if (this.timer === null) return;
+    clearTimeout(this.timer);
+    this.timer = null;
+    await chrome.storage.local.set({ [this.key]: this.snapshot() });
+  }
+}
@@ -3,6 +3,8 @@
  * Uses chrome.storage.local instead of JSON file.
  */
 
+import { DebouncedStore } from './debounced-store';
+
 const STORAGE_KEY = 'jobRegistry';
 
 interface RegistryData {
@@ -10,60 +12,92 @@ interface RegistryData {
   skipped: Record<string, string>;
 }
 
+const APPLIED = 'applied';
+const SKIPPED_PREFIX = 'skipped:';
+
 export class JobRegistry {
-  private applied = new Set<string>();
-  private skipped = new Map<string, string>();
-  private loaded = false;
+  /** jobKey → 'applied' | 'skipped:<reason>', one lookup answers every query. */
+  private statuses = new Map<string, string>();
+  /** Shared first load, so concurrent callers hit storage once. */
+  private loading: Promise<void> | null = null;
+  private writer = new DebouncedStore(STORAGE_KEY, () => this.snapshot());
 
-  async load(): Promise<void> {
-    if (this.loaded) return;
+  load(): Promise<void> {
+    if (!this.loading) {
+      this.loading = this.read().catch(err => {
+        this.loading = null;
+        throw err;
+      });
+    }
+    return this.loading;
+  }
+
+  private async read(): Promise<void> {
     const data = await chrome.storage.local.get(STORAGE_KEY);
     const registry: RegistryData = data[STORAGE_KEY] || { applied: [], skipped: {} };
-    this.applied = new Set(registry.applied);
-    this.skipped = new Map(Object.entries(registry.skipped));
-    this.loaded = true;
+    this.statuses = new Map();
+    for (const [jobKey, reason] of Object.entries(registry.skipped)) {
+      this.statuses.set(jobKey, SKIPPED_PREFIX + reason);
+    }
+    for (const jobKey of registry.applied) {
+      this.statuses.set(jobKey, APPLIED);
+    }
   }
 
-  private async save(): Promise<void> {
-    const data: RegistryData = {
-      applied: Array.from(this.applied).sort(),
-      skipped: Object.fromEntries(Array.from(this.skipped.entries()).sort()),
-    };
-    await chrome.storage.local.set({ [STORAGE_KEY]: data });
+  /** Serialize in insertion order — storage doesn't care about key order, so skip sorting. */
+  private snapshot(): RegistryData {
+    const applied: string[] = [];
+    const skipped: Record<string, string> = {};
+    for (const [jobKey, status] of this.statuses) {
+      if (status === APPLIED) applied.push(jobKey);
+      else skipped[jobKey] = status.slice(SKIPPED_PREFIX.length);
+    }
+    return { applied, skipped };
+  }
+
+  /** Persist any pending changes immediately (call when the bot stops). */
+  flush(): Promise<void> {
+    return this.writer.flush();
   }
 
   async isKnown(jobKey: string): Promise<boolean> {
     await this.load();
-    return this.applied.has(jobKey) || this.skipped.has(jobKey);
+    return this.statuses.has(jobKey);
+  }
+
+  /** Drop every item whose job key is already in the registry, in a single pass. */
+  async filterUnknown<T extends { jobKey: string }>(items: T[]): Promise<T[]> {
+    await this.load();
+    return items.filter(item => !this.statuses.has(item.jobKey));
   }
 
   async markApplied(jobKey: string): Promise<void> {
     await this.load();
-    this.applied.add(jobKey);
-    this.skipped.delete(jobKey);
-    await this.save();
+    this.statuses.set(jobKey, APPLIED);
+    this.writer.schedule();
   }
 
   async markSkipped(jobKey: string, reason: string): Promise<void> {
     await this.load();
-    if (this.applied.has(jobKey)) return;
-    this.skipped.set(jobKey, reason);
-    await this.save();
+    if (this.statuses.get(jobKey) === APPLIED) return;
+    this.statuses.set(jobKey, SKIPPED_PREFIX + reason);
+    this.writer.schedule();
   }
 
   async statusOf(jobKey: string): Promise<string | null> {
     await this.load();
-    if (this.applied.has(jobKey)) return 'applied';
-    const reason = this.skipped.get(jobKey);
-    if (reason) return `skipped:${reason}`;
-    return null;
+    return this.statuses.get(jobKey) ?? null;
   }
 
   get appliedCount(): number {
-    return this.applied.size;
+    let count = 0;
+    for (const status of this.statuses.values()) {
+      if (status === APPLIED) count++;
+    }
+    return count;
   }
 
   get skippedCount(): number {
-    return this.skipped.size;
+    return this.statuses.size - this.appliedCount;
   }
 }
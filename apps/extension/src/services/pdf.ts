@@ -6,177 +6,245 @@
 
 import { TailoredContent, ProfileSettings } from '../types';
 
-// Templates are loaded from extension assets
-let cvTemplate = '';
-let coverTemplate = '';
+// ── Templates ──
 
+const PLACEHOLDER_RE = /\{\{(\w+)\}\}/g;
+
+/**
+ * Template split once at its `{{key}}` placeholders: `parts[i]` is the literal
+ * text before `keys[i]`, and the last part is the text after the final key.
+ */
+interface CompiledTemplate {
+  parts: string[];
+  keys: string[];
+}
+
+function compileTemplate(html: string): CompiledTemplate {
+  const parts: string[] = [];
+  const keys: string[] = [];
+  let last = 0;
+  for (const match of html.matchAll(PLACEHOLDER_RE)) {
+    parts.push(html.slice(last, match.index));
+    keys.push(match[1]);
+    last = match.index! + match[0].length;
+  }
+  parts.push(html.slice(last));
+  return { parts, keys };
+}
+
+/**
+ * Stitch the literal parts and values together without rescanning the template.
+ * Unknown placeholders are left untouched; values are inserted verbatim.
+ */
+function renderTemplate(template: CompiledTemplate, values: Record<string, string>): string {
+  const { parts, keys } = template;
+  let html = parts[0];
+  for (let i = 0; i < keys.length; i++) {
+    const key = keys[i];
+    html += (Object.prototype.hasOwnProperty.call(values, key) ? values[key] : `{{${key}}}`) + parts[i + 1];
+  }
+  return html;
+}
+
+// Templates are loaded from extension assets and compiled once
+const EMPTY_TEMPLATE: CompiledTemplate = { parts: [''], keys: [] };
+let cvTemplate: CompiledTemplate | null = null;
+let coverTemplate: CompiledTemplate | null = null;
+
+/** Fetch the bundled templates; they never change at runtime, so each loads once per worker. */
 export async function loadTemplates(): Promise<void> {
+  if (cvTemplate && coverTemplate) return;
   try {
     const cvUrl = chrome.runtime.getURL('assets/cv_template.html');
     const coverUrl = chrome.runtime.getURL('assets/cover_template.html');
 
-    const [cvResp, coverResp] = await Promise.all([fetch(cvUrl), fetch(coverUrl)]);
+    const [cvResp, coverResp] = await Promise.all([
+      cvTemplate ? null : fetch(cvUrl),
+      coverTemplate ? null : fetch(coverUrl),
+    ]);
 
-    if (cvResp.ok) cvTemplate = await cvResp.text();
-    else console.warn(`Failed to load CV template: ${cvResp.status}`);
+    if (cvResp) {
+      if (cvResp.ok) cvTemplate = compileTemplate(await cvResp.text());
+      else console.warn(`Failed to load CV template: ${cvResp.status}`);
+    }
 
-    if (coverResp.ok) coverTemplate = await coverResp.text();
-    else console.warn(`Failed to load cover template: ${coverResp.status}`);
+    if (coverResp) {
+      if (coverResp.ok) coverTemplate = compileTemplate(await coverResp.text());
+      else console.warn(`Failed to load cover template: ${coverResp.status}`);
+    }
   } catch (err) {
     console.warn('Failed to load templates:', err);
   }
 }
 
+const HTML_ESCAPES: Record<string, string> = {
+  '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;',
+};
+const HTML_SPECIAL_RE = /[&<>"']/g;
+
+/** Escape AI/profile text once before it goes into markup (nullish → ''). */
+function escapeHtml(text: string | null | undefined): string {
+  return text == null ? '' : String(text).replace(HTML_SPECIAL_RE, ch => HTML_ESCAPES[ch]);
+}
+
 const SEP = '<span class="sep">|</span>';
 
+const MONTHS_PT = ['janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho',
+  'julho', 'agosto', 'setembro', 'outubro', 'novembro', 'dezembro'];
+
+/** Linked profile fields, in display order; plain fields are email/phone/location. */
+const CONTACT_LINKS: [keyof ProfileSettings, string][] = [
+  ['linkedin', 'LinkedIn'],
+  ['github', 'GitHub'],
+  ['portfolio', 'Portfolio'],
+];
+
+/** Contact line per settings profile — the same object serves every document of a run. */
+const contactHtmlCache = new WeakMap<ProfileSettings, string>();
+
 function buildContactHtml(profile: ProfileSettings): string {
-  const parts = [profile.email, profile.phone];
-  if (profile.linkedin) parts.push(`<a href="${profile.linkedin}">LinkedIn</a>`);
-  if (profile.github) parts.push(`<a href="${profile.github}">GitHub</a>`);
-  if (profile.portfolio) parts.push(`<a href="${profile.portfolio}">Portfolio</a>`);
-  const locationParts = [profile.city, profile.state].filter(Boolean);
-  if (locationParts.length) parts.push(locationParts.join(', '));
-  return parts.filter(Boolean).join(SEP);
-}
+  let html = contactHtmlCache.get(profile);
+  if (html !== undefined) return html;
 
-function fillProfile(html: string, profile: ProfileSettings): string {
-  html = html.replace(/\{\{profile_name\}\}/g, profile.name.toUpperCase());
-  html = html.replace(/\{\{profile_contact\}\}/g, buildContactHtml(profile));
+  const parts = [escapeHtml(profile.email), escapeHtml(profile.phone)];
+  for (const [field, text] of CONTACT_LINKS) {
+    if (profile[field]) parts.push(`<a href="${escapeHtml(profile[field])}">${text}</a>`);
+  }
+  parts.push(escapeHtml([profile.city, profile.state].filter(Boolean).join(', ')));
+  html = parts.filter(Boolean).join(SEP);
+
+  contactHtmlCache.set(profile, html);
   return html;
 }
 
-export function fillCvTemplate(data: TailoredContent, profile?: ProfileSettings): string {
-  let html = cvTemplate;
-
-  if (profile) html = fillProfile(html, profile);
-
-  html = html.replace('{{objective}}', data.objective || 'Full Stack Developer');
-  html = html.replace('{{section_summary}}', data.section_summary || 'Resumo Profissional');
-  html = html.replace('{{summary}}', data.summary || '');
-  html = html.replace('{{section_skills}}', data.section_skills || 'Competências');
-  html = html.replace('{{section_experience}}', data.section_experience || 'Experiência Profissional');
-  html = html.replace('{{section_education}}', data.section_education || 'Formação');
-  html = html.replace('{{section_certifications}}', data.section_certifications || 'Certificações');
-  html = html.replace('{{section_languages}}', data.section_languages || 'Idiomas');
+function profileValues(profile?: ProfileSettings): Record<string, string> {
+  if (!profile) return {};
+  return {
+    profile_name: escapeHtml(profile.name.toUpperCase()),
+    profile_contact: buildContactHtml(profile),
+  };
+}
 
+export function fillCvTemplate(data: TailoredContent, profile?: ProfileSettings): string {
   // Keywords badges
-  const keywordsHtml = (data.keywords || []).map(kw => `<span class="badge">${kw}</span>`).join('');
-  html = html.replace('{{keywords}}', keywordsHtml);
+  const keywordsHtml = (data.keywords || []).map(kw => `<span class="badge">${escapeHtml(kw)}</span>`).join('');
 
   // Skills grid
   const skillsHtml = (data.skills || []).map(s =>
-    `<div class="row"><span class="label">${s.label}:</span> ${s.items}</div>`
+    `<div class="row"><span class="label">${escapeHtml(s.label)}:</span> ${escapeHtml(s.items)}</div>`
   ).join('\n');
-  html = html.replace('{{skills}}', skillsHtml);
 
   // Experience
   const expHtml = (data.experience || []).map(job => {
-    const bullets = (job.bullets || []).map(b => `<li>${b}</li>`).join('');
+    const bullets = (job.bullets || []).map(b => `<li>${escapeHtml(b)}</li>`).join('');
     return `<div class="job">
-  <div class="job-header"><span class="job-title">${job.title}</span><span class="job-date">${job.date}</span></div>
-  <div class="job-company">${job.company}</div>
+  <div class="job-header"><span class="job-title">${escapeHtml(job.title)}</span><span class="job-date">${escapeHtml(job.date)}</span></div>
+  <div class="job-company">${escapeHtml(job.company)}</div>
   <ul>${bullets}</ul>
 </div>`;
   }).join('\n');
-  html = html.replace('{{experience}}', expHtml);
 
   // Education
   const eduHtml = (data.education || []).map(e =>
-    `<strong>${e.degree}</strong> | ${e.institution} | ${e.period}<br>`
+    `<strong>${escapeHtml(e.degree)}</strong> | ${escapeHtml(e.institution)} | ${escapeHtml(e.period)}<br>`
   ).join('\n');
-  html = html.replace('{{education}}', eduHtml);
 
   // Certifications
   const certs = data.certifications || [];
   const certsHtml = certs.length > 0
-    ? '<ul>' + certs.map(c => `<li>${c}</li>`).join('') + '</ul>'
+    ? '<ul>' + certs.map(c => `<li>${escapeHtml(c)}</li>`).join('') + '</ul>'
     : '';
-  html = html.replace('{{certifications}}', certsHtml);
 
   // Languages
-  const langsHtml = (data.languages || []).map(l => `${l.name} – ${l.level}`).join(' &nbsp;|&nbsp; ');
-  html = html.replace('{{languages}}', langsHtml);
+  const langsHtml = (data.languages || []).map(l => `${escapeHtml(l.name)} – ${escapeHtml(l.level)}`).join(' &nbsp;|&nbsp; ');
 
   // Additional info
   const additional = data.additional_info || '';
   const additionalHtml = additional
-    ? `<h2>${data.section_additional || 'Informações Adicionais'}</h2>\n<p class="additional">${additional}</p>`
+    ? `<h2>${escapeHtml(data.section_additional || 'Informações Adicionais')}</h2>\n<p class="additional">${escapeHtml(additional)}</p>`
     : '';
-  html = html.replace('{{additional_info}}', additionalHtml);
 
-  return html;
+  return renderTemplate(cvTemplate || EMPTY_TEMPLATE, {
+    ...profileValues(profile),
+    objective: escapeHtml(data.objective || 'Full Stack Developer'),
+    section_summary: escapeHtml(data.section_summary || 'Resumo Profissional'),
+    summary: escapeHtml(data.summary || ''),
+    section_skills: escapeHtml(data.section_skills || 'Competências'),
+    section_experience: escapeHtml(data.section_experience || 'Experiência Profissional'),
+    section_education: escapeHtml(data.section_education || 'Formação'),
+    section_certifications: escapeHtml(data.section_certifications || 'Certificações'),
+    section_languages: escapeHtml(data.section_languages || 'Idiomas'),
+    keywords: keywordsHtml,
+    skills: skillsHtml,
+    experience: expHtml,
+    education: eduHtml,
+    certifications: certsHtml,
+    languages: langsHtml,
+    additional_info: additionalHtml,
+  });
 }
 
-export function fillCoverTemplate(data: TailoredContent, profile?: ProfileSettings): string {
-  let html = coverTemplate;
-
-  if (profile) html = fillProfile(html, profile);
-
-  html = html.replace('{{subtitle}}', data.cover_subtitle || 'Full Stack Developer');
-  html = html.replace('{{greeting}}', data.cover_greeting || 'Prezado(a) Recrutador(a),');
-  html = html.replace('{{closing}}', data.cover_closing || 'Atenciosamente');
-
-  // Date
+/** Cover letter values shared by the standalone letter and the page embedded in the CV. */
+function coverValues(data: TailoredContent, profile?: ProfileSettings): Record<string, string> {
   const now = new Date();
-  const city = profile?.city || '';
-  const monthsPt = ['', 'janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho',
-    'julho', 'agosto', 'setembro', 'outubro', 'novembro', 'dezembro'];
-  const dateStr = city ? `${city}, ${now.getDate()} de ${monthsPt[now.getMonth() + 1]} de ${now.getFullYear()}` : '';
-  html = html.replace('{{date}}', dateStr);
-
-  // Paragraphs
-  const parasHtml = (data.cover_paragraphs || []).map(p => `<p>${p}</p>`).join('\n');
-  html = html.replace('{{paragraphs}}', parasHtml);
-
-  return html;
+  const city = escapeHtml(profile?.city);
+  return {
+    subtitle: escapeHtml(data.cover_subtitle || 'Full Stack Developer'),
+    greeting: escapeHtml(data.cover_greeting || 'Prezado(a) Recrutador(a),'),
+    closing: escapeHtml(data.cover_closing || 'Atenciosamente'),
+    date: city ? `${city}, ${now.getDate()} de ${MONTHS_PT[now.getMonth()]} de ${now.getFullYear()}` : '',
+    paragraphs: (data.cover_paragraphs || []).map(p => `<p>${escapeHtml(p)}</p>`).join('\n'),
+  };
 }
 
-/**
- * Generates CV HTML with the cover letter embedded as an extra page.
- * Used when the job posting has no separate cover letter upload field.
- */
-export function fillCvWithCoverTemplate(data: TailoredContent, profile?: ProfileSettings): string {
-  const cvHtml = fillCvTemplate(data, profile);
-
-  // Build the cover letter section to inject before </body>
-  const name = profile?.name?.toUpperCase() || '';
-  const contactHtml = profile ? buildContactHtml(profile) : '';
-  const subtitle = data.cover_subtitle || 'Full Stack Developer';
-  const greeting = data.cover_greeting || 'Prezado(a) Recrutador(a),';
-  const closing = data.cover_closing || 'Atenciosamente';
-
-  // Date
-  const now = new Date();
-  const city = profile?.city || '';
-  const monthsPt = ['', 'janeiro', 'fevereiro', 'março', 'abril', 'maio', 'junho',
-    'julho', 'agosto', 'setembro', 'outubro', 'novembro', 'dezembro'];
-  const dateStr = city ? `${city}, ${now.getDate()} de ${monthsPt[now.getMonth() + 1]} de ${now.getFullYear()}` : '';
-
-  const parasHtml = (data.cover_paragraphs || []).map(p => `<p>${p}</p>`).join('\n');
+export function fillCoverTemplate(data: TailoredContent, profile?: ProfileSettings): string {
+  return renderTemplate(coverTemplate || EMPTY_TEMPLATE, {
+    ...profileValues(profile),
+    ...coverValues(data, profile),
+  });
+}
 
-  const coverSection = `
+/** Cover letter page appended to the CV; same placeholders as cover_template.html. */
+const EMBEDDED_COVER_TEMPLATE = compileTemplate(`
 <!-- Cover Letter Page -->
 <div style="page-break-before: always;"></div>
 <div class="banner" style="background:#16213e;padding:36px 44px 28px 44px;color:#fff;position:relative;overflow:hidden;">
-  <h1 style="font-size:28pt;font-weight:800;letter-spacing:2px;margin-bottom:4px;position:relative;z-index:1;">${name}</h1>
-  <div style="font-size:12pt;color:#e94560;font-weight:600;letter-spacing:0.5px;margin-bottom:10px;position:relative;z-index:1;">${subtitle}</div>
-  <div style="font-size:8.5pt;color:rgba(255,255,255,0.75);position:relative;z-index:1;">${contactHtml}</div>
+  <h1 style="font-size:28pt;font-weight:800;letter-spacing:2px;margin-bottom:4px;position:relative;z-index:1;">{{profile_name}}</h1>
+  <div style="font-size:12pt;color:#e94560;font-weight:600;letter-spacing:0.5px;margin-bottom:10px;position:relative;z-index:1;">{{subtitle}}</div>
+  <div style="font-size:8.5pt;color:rgba(255,255,255,0.75);position:relative;z-index:1;">{{profile_contact}}</div>
 </div>
 <div style="height:4px;background:#e94560;"></div>
 <div style="padding:28px 44px 40px 44px;">
-  <div style="font-size:9.5pt;color:#888;margin-bottom:20px;font-style:italic;">${dateStr}</div>
-  <div style="font-size:10.5pt;font-weight:600;color:#16213e;margin-bottom:14px;">${greeting}</div>
+  <div style="font-size:9.5pt;color:#888;margin-bottom:20px;font-style:italic;">{{date}}</div>
+  <div style="font-size:10.5pt;font-weight:600;color:#16213e;margin-bottom:14px;">{{greeting}}</div>
   <div class="body-text" style="font-size:10.5pt;text-align:justify;color:#333;line-height:1.65;">
-    ${parasHtml}
+    {{paragraphs}}
   </div>
   <div style="margin-top:28px;font-size:10.5pt;color:#333;">
-    ${closing},<br>
-    <div style="font-weight:700;color:#16213e;margin-top:6px;font-size:11pt;">${name}</div>
+    {{closing}},<br>
+    <div style="font-weight:700;color:#16213e;margin-top:6px;font-size:11pt;">{{profile_name}}</div>
   </div>
-</div>`;
+</div>`);
+
+/**
+ * Generates CV HTML with the cover letter embedded as an extra page.
+ * Used when the job posting has no separate cover letter upload field.
+ */
+export function fillCvWithCoverTemplate(data: TailoredContent, profile?: ProfileSettings): string {
+  const cvHtml = fillCvTemplate(data, profile);
 
-  // Inject before </body>
-  return cvHtml.replace('</body>', coverSection + '\n</body>');
+  const coverSection = renderTemplate(EMBEDDED_COVER_TEMPLATE, {
+    profile_name: '',
+    profile_contact: '',
+    ...profileValues(profile),
+    ...coverValues(data, profile),
+  });
+
+  // Inject before </body>: it sits at the very end, so search backwards, and splice
+  // rather than String.replace so `$&`-like text in the letter is kept verbatim
+  const bodyEnd = cvHtml.lastIndexOf('</body>');
+  if (bodyEnd === -1) return cvHtml;
+  return cvHtml.slice(0, bodyEnd) + coverSection + '\n' + cvHtml.slice(bodyEnd);
 }
 
 /**
@@ -40,6 +40,7 @@ export interface Settings {
   language: string; // us, uk, br, fr, de, es
   searchUrls: string[];
   maxApplies: number; // 0 = unlimited
+  applyConcurrency: number; // jobs applied to in parallel, each in its own tab (1-3)
   availableToday: boolean; // When true, date fields asking "when can you start" → today's date
   personalization: {
     enabled: boolean;
@@ -55,6 +56,7 @@ export const DEFAULT_SETTINGS: Settings = {
   language: 'br',
   searchUrls: [],
   maxApplies: 0,
+  applyConcurrency: 1,
   availableToday: true,
   personalization: {
     enabled: true,
@@ -168,6 +170,7 @@ export type MessageType =
   | 'STATUS_UPDATE'
   | 'GET_NEXT_PAGE'
   | 'NEXT_PAGE'
+  | 'FETCH_RESULTS_PAGE'
   | 'GET_STATE'
   | 'SET_STATE'
   | 'START_BOT'
@@ -0,0 +1,24 @@
+/**
+ * Binary <-> base64 helpers for message passing.
+ * chrome.runtime messages are JSON-serialized, so PDFs travel as base64
+ * strings (~1.33x the raw size) instead of number[] (~4x, one entry per byte).
+ */
+
+const CHUNK_SIZE = 0x8000;
+
+export function bufferToBase64(buffer: ArrayBuffer): string {
+  const bytes = new Uint8Array(buffer);
+  const chunks: string[] = [];
+  // Chunked so String.fromCharCode never exceeds the argument limit
+  for (let i = 0; i < bytes.length; i += CHUNK_SIZE) {
+    chunks.push(String.fromCharCode.apply(null, bytes.subarray(i, i + CHUNK_SIZE) as unknown as number[]));
+  }
+  return btoa(chunks.join(''));
+}
+
+export function base64ToBuffer(data: string): ArrayBuffer {
+  const binary = atob(data);
+  const bytes = new Uint8Array(binary.length);
+  for (let i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+  return bytes.buffer;
+}
@@ -1,29 +1,46 @@
 /**
  * Multi-language keyword maps for Indeed button/text matching.
  * Ported from Python indeed.py
+ *
+ * :has-text() matching is case-insensitive, so each text appears only once per list.
  */
 
+const REGEX_SPECIAL_RE = /[.*+?^${}()|[\]\\]/g;
+
+/** Compile a keyword list into one case-insensitive alternation, so a text is scanned once. */
+export function keywordPattern(keywords: readonly string[]): RegExp {
+  return new RegExp(keywords.map(kw => kw.replace(REGEX_SPECIAL_RE, '\\$&')).join('|'), 'i');
+}
+
 export const SUBMIT_KEYWORDS = [
   'submit', 'soumettre', 'enviar', 'déposer', 'apply',
   'bewerben', 'postular', 'candidatura',
 ];
 
+export const SUBMIT_RE = keywordPattern(SUBMIT_KEYWORDS);
+
 export const CONTINUE_KEYWORDS = [
   'continue', 'continuer', 'continuar', 'next',
   'próximo', 'suivant', 'weiter',
 ];
 
+export const CONTINUE_RE = keywordPattern(CONTINUE_KEYWORDS);
+
 export const SKIP_KEYWORDS = [
   'back', 'previous', 'anterior', 'retour', 'cancel',
   'close', 'fechar', 'voltar', 'précédent',
 ];
 
+export const SKIP_RE = keywordPattern(SKIP_KEYWORDS);
+
 export const EXTERNAL_APPLY_KEYWORDS = [
   'site da empresa', 'company site', "company's site",
   "site de l'entreprise", 'unternehmenswebsite',
   'sitio de la empresa', 'external site',
 ];
 
+export const EXTERNAL_APPLY_RE = keywordPattern(EXTERNAL_APPLY_KEYWORDS);
+
 export const APPLY_BUTTON_SELECTORS = [
   'button:has(span[class*="css-1ebo7dz"])',
   'button[id*="indeedApplyButton"]',
@@ -39,6 +56,15 @@ export const APPLY_HEURISTIC_KEYWORDS = [
   'postuler', 'apply', 'candidat', 'bewerben', 'postular',
 ];
 
+export const APPLY_HEURISTIC_RE = keywordPattern(APPLY_HEURISTIC_KEYWORDS);
+
+/** aria-labels of dialog close/cancel buttons, never taken for an apply button. */
+export const DISMISS_LABEL_KEYWORDS = [
+  'close', 'cancel', 'fermer', 'annuler', 'fechar',
+];
+
+export const DISMISS_LABEL_RE = keywordPattern(DISMISS_LABEL_KEYWORDS);
+
 export const SUBMIT_SELECTORS = [
   'button:visible:has-text("Déposer ma candidature")',
   'button:visible:has-text("Soumettre")',
@@ -65,9 +91,7 @@ export const CONTINUE_SELECTORS = [
 export const RESUME_OPTIONS_SELECTORS = [
   '[data-testid="ResumeOptionsMenu"]',
   'button:visible:has-text("opções de currículo")',
-  'button:visible:has-text("Opções de currículo")',
   'button:visible:has-text("Resume options")',
-  'button:visible:has-text("resume options")',
   'button:visible:has-text("Opções")',
   'button:visible:has-text("Options")',
   '[data-testid*="resumeSelection"] button:visible',
@@ -84,7 +108,6 @@ export const UPLOAD_BUTTON_SELECTORS = [
   '[data-testid="resume-selection-file-resume-upload-radio-card-button"]',
   '[data-testid="resume-selection-file-resume-radio-card-button"]',
   'button:visible:has-text("Carregar um arquivo diferente")',
-  'button:visible:has-text("carregar um arquivo diferente")',
   'button:visible:has-text("Upload a different file")',
   'button:visible:has-text("upload a different")',
   'button:visible:has-text("Selecionar arquivo")',
@@ -98,7 +121,6 @@ export const UPLOAD_BUTTON_SELECTORS = [
   'button:visible:has-text("Upload")',
   'a:visible:has-text("carregar")',
   'a:visible:has-text("Upload")',
-  'a:visible:has-text("upload")',
   'label:visible:has-text("Upload")',
   'label:visible:has-text("Carregar")',
   '[data-testid="ResumeUploadButton"]',
@@ -107,11 +129,9 @@ export const UPLOAD_BUTTON_SELECTORS = [
 
 export const COVER_LETTER_SELECTORS = [
   'button:visible:has-text("cover letter")',
-  'button:visible:has-text("Cover Letter")',
   'button:visible:has-text("Upload cover")',
   'button:visible:has-text("carta")',
   'button:visible:has-text("carta de apresentação")',
-  'button:visible:has-text("Carta de Apresentação")',
   'a:visible:has-text("cover letter")',
   'a:visible:has-text("Upload cover")',
   'a:visible:has-text("carta de apresentação")',
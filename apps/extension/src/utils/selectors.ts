@@ -6,8 +6,9 @@
 /** Check if an element is visible (has layout and not hidden) */
 export function isVisible(el: Element): boolean {
   if (!(el instanceof HTMLElement)) return false;
-  if (el.offsetParent === null && getComputedStyle(el).position !== 'fixed') return false;
+  // One computed style serves both the fixed-position exception and the hidden checks
   const style = getComputedStyle(el);
+  if (el.offsetParent === null && style.position !== 'fixed') return false;
   return style.display !== 'none' && style.visibility !== 'hidden' && style.opacity !== '0';
 }
 
@@ -16,6 +17,37 @@ export function isDisabled(el: Element): boolean {
   return (el as HTMLButtonElement).disabled === true || el.getAttribute('aria-disabled') === 'true';
 }
 
+interface ParsedSelector {
+  css: string;
+  hasText: string | null;
+  visible: boolean;
+}
+
+/** Parsed form of each selector string, so the pseudo-selector regexes run once per selector. */
+const parsedSelectors = new Map<string, ParsedSelector>();
+
+function parseSelector(selector: string): ParsedSelector {
+  let parsed = parsedSelectors.get(selector);
+  if (parsed) return parsed;
+
+  // Extract :has-text("...") if present
+  const hasTextMatch = selector.match(/:has-text\("([^"]+)"\)/);
+
+  // Remove custom pseudo-selectors for the actual CSS query
+  const css = selector
+    .replace(/:has-text\("[^"]+"\)/, '')
+    .replace(/:visible/g, '')
+    .trim();
+
+  parsed = {
+    css: css || '*',
+    hasText: hasTextMatch ? hasTextMatch[1].toLowerCase() : null,
+    visible: selector.includes(':visible'),
+  };
+  parsedSelectors.set(selector, parsed);
+  return parsed;
+}
+
 /**
  * Parse and query a selector that may contain :has-text("...") and :visible pseudo-selectors.
  * These are Playwright-specific and not part of CSS, so we handle them manually.
@@ -26,49 +58,97 @@ export function isDisabled(el: Element): boolean {
  *   'input[type="file"]'  (standard CSS, passed through)
  */
 function parseAndQuery(root: Element | Document, selector: string): Element[] {
-  // Extract :has-text("...") if present
-  const hasTextMatch = selector.match(/:has-text\("([^"]+)"\)/);
-  const visibleFlag = selector.includes(':visible');
-
-  // Remove custom pseudo-selectors for the actual CSS query
-  let cssSelector = selector
-    .replace(/:has-text\("[^"]+"\)/, '')
-    .replace(/:visible/g, '')
-    .trim();
-
-  if (!cssSelector) cssSelector = '*';
+  const { css, hasText, visible } = parseSelector(selector);
 
   let elements: Element[];
   try {
-    elements = Array.from(root.querySelectorAll(cssSelector));
+    elements = Array.from(root.querySelectorAll(css));
   } catch {
     return [];
   }
 
   // Filter by :has-text()
-  if (hasTextMatch) {
-    const searchText = hasTextMatch[1].toLowerCase();
-    elements = elements.filter(el => (el.textContent || '').toLowerCase().includes(searchText));
+  if (hasText) {
+    elements = elements.filter(el => (el.textContent || '').toLowerCase().includes(hasText));
   }
 
   // Filter by :visible
-  if (visibleFlag) {
+  if (visible) {
     elements = elements.filter(isVisible);
   }
 
   return elements;
 }
 
-/** Try a list of selectors and return the first matching element. */
+/** A selector list folded into one CSS query, plus the parsed entries in priority order. */
+interface SelectorGroup {
+  css: string;
+  parsed: ParsedSelector[];
+}
+
+/** Compiled groups, keyed by the (usually module-level) selector array. */
+const selectorGroups = new WeakMap<string[], SelectorGroup>();
+
+function compileGroup(selectors: string[]): SelectorGroup {
+  let group = selectorGroups.get(selectors);
+  if (!group) {
+    const parsed = selectors.map(parseSelector);
+    // Lists like SUBMIT_SELECTORS differ only in :has-text(), so most entries share one CSS part
+    group = { css: Array.from(new Set(parsed.map(p => p.css))).join(', '), parsed };
+    selectorGroups.set(selectors, group);
+  }
+  return group;
+}
+
+/**
+ * Try a list of selectors and return the first matching element.
+ * Runs one combined query for the whole list and then checks candidates against
+ * each selector in priority order, instead of one full query per selector.
+ */
 export function findFirst(
   selectors: string[],
   root: Element | Document = document,
   options: { visibleOnly?: boolean } = {}
 ): Element | null {
-  for (const sel of selectors) {
-    const matches = parseAndQuery(root, sel);
-    for (const el of matches) {
-      if (options.visibleOnly && !isVisible(el)) continue;
+  const group = compileGroup(selectors);
+
+  let candidates: Element[];
+  try {
+    candidates = Array.from(root.querySelectorAll(group.css));
+  } catch {
+    // One invalid selector poisons the combined query — fall back to one query per selector
+    for (const sel of selectors) {
+      const matches = parseAndQuery(root, sel);
+      for (const el of matches) {
+        if (options.visibleOnly && !isVisible(el)) continue;
+        return el;
+      }
+    }
+    return null;
+  }
+
+  const texts = new Map<Element, string>();
+  const textOf = (el: Element): string => {
+    let text = texts.get(el);
+    if (text === undefined) {
+      text = (el.textContent || '').toLowerCase();
+      texts.set(el, text);
+    }
+    return text;
+  };
+
+  // Candidates matching each distinct CSS part, filtered once and shared by its selectors
+  const matchesByCss = new Map<string, Element[]>();
+
+  for (const { css, hasText, visible } of group.parsed) {
+    let matching = matchesByCss.get(css);
+    if (!matching) {
+      matching = candidates.filter(el => el.matches(css));
+      matchesByCss.set(css, matching);
+    }
+    for (const el of matching) {
+      if (hasText && !textOf(el).includes(hasText)) continue;
+      if ((visible || options.visibleOnly) && !isVisible(el)) continue;
       return el;
     }
   }
@@ -98,22 +178,80 @@ export function clickFirst(
   }
 }
 
-/** Wait for a selector to appear in the DOM, with polling. */
+/**
+ * Resolve with `probe()`'s first non-null result, re-checking whenever `root`'s
+ * subtree or attributes change (style/class flips make elements visible) rather
+ * than on a polling interval; null after `timeoutMs`.
+ */
+function waitForMatch(
+  root: Element | Document,
+  probe: () => Element | null,
+  timeoutMs: number
+): Promise<Element | null> {
+  return new Promise(resolve => {
+    const initial = probe();
+    if (initial) return resolve(initial);
+
+    let timer: ReturnType<typeof setTimeout>;
+    const finish = (el: Element | null) => {
+      observer.disconnect();
+      clearTimeout(timer);
+      resolve(el);
+    };
+    const observer = new MutationObserver(() => {
+      const el = probe();
+      if (el) finish(el);
+    });
+    observer.observe(root, { childList: true, subtree: true, attributes: true });
+    timer = setTimeout(() => finish(null), timeoutMs);
+  });
+}
+
+/** Wait for a selector to appear in the DOM. */
 export function waitForSelector(
   selector: string,
   root: Element | Document = document,
-  timeoutMs: number = 10000,
-  intervalMs: number = 300
+  timeoutMs: number = 10000
 ): Promise<Element | null> {
+  return waitForMatch(root, () => parseAndQuery(root, selector)[0] || null, timeoutMs);
+}
+
+/**
+ * Wait until any selector in the list matches and return the highest-priority
+ * match — one combined query per DOM change instead of one wait per selector.
+ */
+export function waitForFirst(
+  selectors: string[],
+  root: Element | Document = document,
+  timeoutMs: number = 10000
+): Promise<Element | null> {
+  return waitForMatch(root, () => findFirst(selectors, root), timeoutMs);
+}
+
+/**
+ * Wait until `root` has gone `quietMs` without DOM changes — i.e. the framework
+ * finished re-rendering after a click or fill — but never longer than `timeoutMs`.
+ */
+export function waitForDomSettle(
+  root: Element | Document = document,
+  quietMs: number = 100,
+  timeoutMs: number = 500
+): Promise<void> {
   return new Promise(resolve => {
-    const deadline = Date.now() + timeoutMs;
-    const check = () => {
-      const matches = parseAndQuery(root, selector);
-      if (matches.length > 0) return resolve(matches[0]);
-      if (Date.now() > deadline) return resolve(null);
-      setTimeout(check, intervalMs);
+    let quietTimer: ReturnType<typeof setTimeout>;
+    const finish = () => {
+      observer.disconnect();
+      clearTimeout(quietTimer);
+      clearTimeout(deadline);
+      resolve();
     };
-    check();
+    const observer = new MutationObserver(() => {
+      clearTimeout(quietTimer);
+      quietTimer = setTimeout(finish, quietMs);
+    });
+    observer.observe(root, { childList: true, subtree: true, attributes: true, characterData: true });
+    quietTimer = setTimeout(finish, quietMs);
+    const deadline = setTimeout(finish, timeoutMs);
   });
 }
 
@@ -206,23 +344,16 @@ export function setInputFiles(input: HTMLInputElement, file: File): void {
   input.dispatchEvent(new Event('input', { bubbles: true }));
   input.dispatchEvent(new Event('change', { bubbles: true }));
 
-  // Step 2: Send file data to MAIN world content script via postMessage.
+  // Step 2: Send the file to MAIN world content script via postMessage.
   // The MAIN world script (mainworld.ts) listens for 'smartapply-set-files'
   // and calls React's onChange directly. Using postMessage instead of
-  // CustomEvent because postMessage properly serializes data across worlds.
-  const selector = buildInputSelector(input);
-  const reader = new FileReader();
-  reader.onload = () => {
-    const base64 = (reader.result as string).split(',')[1] || '';
-    window.postMessage({
-      type: 'smartapply-set-files',
-      selector,
-      fileName: file.name,
-      fileType: file.type,
-      fileDataBase64: base64,
-    }, '*');
-  };
-  reader.readAsDataURL(file);
+  // CustomEvent because postMessage properly serializes data across worlds —
+  // File is structured-cloneable, so it crosses as-is with no base64 round-trip.
+  window.postMessage({
+    type: 'smartapply-set-files',
+    selector: buildInputSelector(input),
+    file,
+  }, '*');
 }
 
 /**
@@ -237,6 +368,7 @@ export async function verifyUploadAccepted(timeoutMs = 3000, expectedFilename?:
   const labelBefore = document.querySelector(
     '[data-testid="resume-selection-file-resume-upload-radio-card-label"], [data-testid="resume-selection-file-resume-radio-card-label"]'
   )?.textContent?.trim() || '';
+  const expectedName = expectedFilename?.replace('.pdf', '');
 
   const deadline = Date.now() + timeoutMs;
   while (Date.now() < deadline) {
@@ -245,15 +377,18 @@ export async function verifyUploadAccepted(timeoutMs = 3000, expectedFilename?:
     const resumeLabel = document.querySelector(
       '[data-testid="resume-selection-file-resume-upload-radio-card-label"], [data-testid="resume-selection-file-resume-radio-card-label"]'
     )?.textContent?.trim() || '';
-    if (expectedFilename && resumeLabel.includes(expectedFilename.replace('.pdf', ''))) return true;
+    if (expectedName && resumeLabel.includes(expectedName)) return true;
     if (!expectedFilename && resumeLabel !== labelBefore && resumeLabel.length > 0) return true;
 
     // Secondary check: "Carregado agora" / "Uploaded just now" text appeared
-    // (indicates a fresh upload was processed by React)
-    const bodyText = document.body?.innerText || '';
-    if (expectedFilename && bodyText.includes(expectedFilename.replace('.pdf', ''))
-        && (bodyText.includes('Carregado agora') || bodyText.includes('Uploaded just now') || bodyText.includes('just now'))) {
-      return true;
+    // (indicates a fresh upload was processed by React). innerText, not textContent:
+    // only rendered text counts, never hidden markup or inline script/JSON data
+    if (expectedName) {
+      const bodyText = document.body?.innerText || '';
+      if (bodyText.includes(expectedName)
+          && (bodyText.includes('Carregado agora') || bodyText.includes('Uploaded just now') || bodyText.includes('just now'))) {
+        return true;
+      }
     }
 
     await new Promise(r => setTimeout(r, 300));
@@ -275,6 +410,33 @@ export interface InputConstraints {
   required: boolean;
 }
 
+// ── Date / pattern regexes (compiled once; none use the g flag, so sharing is safe) ──
+
+/** Placeholder-style date hint such as DD/MM/YYYY or mm-dd. */
+export const DATE_HINT_RE = /[DMY]{2,4}/i;
+
+/** An explicit date format mentioned in hint or error text. */
+export const DATE_FORMAT_RE = /(DD\/MM\/YYYY|MM\/DD\/YYYY|YYYY-MM-DD)/i;
+
+const SLASH_DATE_RE = /^\d{2}\/\d{2}\/\d{4}$/;
+const ISO_DATE_RE = /^\d{4}-\d{2}-\d{2}$/;
+
+/** Compiled `pattern` attributes; null marks a pattern that isn't a valid RegExp. */
+const patternCache = new Map<string, RegExp | null>();
+
+function compilePattern(pattern: string): RegExp | null {
+  let re = patternCache.get(pattern);
+  if (re === undefined) {
+    try {
+      re = new RegExp(pattern);
+    } catch {
+      re = null; // invalid regex, skip
+    }
+    patternCache.set(pattern, re);
+  }
+  return re;
+}
+
 /** Extract HTML validation constraints from an input element. */
 export function getInputConstraints(el: HTMLInputElement | HTMLTextAreaElement): InputConstraints {
   const constraints: InputConstraints = {
@@ -295,7 +457,7 @@ export function getInputConstraints(el: HTMLInputElement | HTMLTextAreaElement):
       // Look for hint/helper text near the input (common in React form libraries)
       const hintEl = parent.querySelector('[class*="hint" i], [class*="helper" i], [class*="description" i], [id*="hint" i], small');
       const hintText = hintEl?.textContent?.trim() || '';
-      if (hintText && hintText.match(/[DMY]{2,4}/i)) {
+      if (hintText && DATE_HINT_RE.test(hintText)) {
         placeholder = hintText;
       }
     }
@@ -316,7 +478,7 @@ export function getInputConstraints(el: HTMLInputElement | HTMLTextAreaElement):
       // Check if there's a date format hint in the error message or nearby text
       const parentBlock = el.closest('[data-testid]') || el.closest('div');
       const allText = parentBlock?.textContent || '';
-      const dateFormatMatch = allText.match(/(DD\/MM\/YYYY|MM\/DD\/YYYY|YYYY-MM-DD)/i);
+      const dateFormatMatch = allText.match(DATE_FORMAT_RE);
       if (dateFormatMatch) {
         placeholder = dateFormatMatch[1];
       }
@@ -366,18 +528,18 @@ export function validateAnswer(
   }
 
   // Date validation: check format matches placeholder (e.g., DD/MM/YYYY)
-  if (constraints.type === 'date' || constraints.placeholder?.match(/[DMY]{2,4}/i)) {
+  if (constraints.type === 'date' || DATE_HINT_RE.test(constraints.placeholder || '')) {
     const ph = constraints.placeholder || '';
     if (ph.includes('DD/MM/YYYY') || ph.includes('dd/mm/yyyy')) {
-      if (!/^\d{2}\/\d{2}\/\d{4}$/.test(answer)) {
+      if (!SLASH_DATE_RE.test(answer)) {
         return { valid: false, error: `Date must be in DD/MM/YYYY format, got "${answer}"` };
       }
     } else if (ph.includes('MM/DD/YYYY') || ph.includes('mm/dd/yyyy')) {
-      if (!/^\d{2}\/\d{2}\/\d{4}$/.test(answer)) {
+      if (!SLASH_DATE_RE.test(answer)) {
         return { valid: false, error: `Date must be in MM/DD/YYYY format, got "${answer}"` };
       }
     } else if (ph.includes('YYYY-MM-DD') || ph.includes('yyyy-mm-dd')) {
-      if (!/^\d{4}-\d{2}-\d{2}$/.test(answer)) {
+      if (!ISO_DATE_RE.test(answer)) {
         return { valid: false, error: `Date must be in YYYY-MM-DD format, got "${answer}"` };
       }
     }
@@ -398,11 +560,10 @@ export function validateAnswer(
   }
 
   if (constraints.pattern) {
-    try {
-      if (!new RegExp(constraints.pattern).test(answer)) {
-        return { valid: false, error: `Value doesn't match pattern: ${constraints.pattern}` };
-      }
-    } catch { /* invalid regex, skip */ }
+    const re = compilePattern(constraints.pattern);
+    if (re && !re.test(answer)) {
+      return { valid: false, error: `Value doesn't match pattern: ${constraints.pattern}` };
+    }
   }
 
   return { valid: true };
@@ -454,15 +615,24 @@ export function detectValidationError(el: HTMLInputElement | HTMLTextAreaElement
   return null;
 }
 
-/** Get label text for an input element. */
-export function getLabelForInput(inp: Element): string {
-  const id = inp.getAttribute('id');
-  if (id) {
-    const label = document.querySelector(`label[for="${id}"]`);
-    if (label) {
+/**
+ * Get label text for an input element.
+ * `ancestorLabels` memoizes the container fallback for one pass over a form, so
+ * fields sharing a wrapper (e.g. one legend for several inputs) look it up once.
+ */
+export function getLabelForInput(inp: Element, ancestorLabels?: WeakMap<Element, string>): string {
+  // Native association covers both label[for=id] and wrapping <label>s
+  const labels = (inp as HTMLInputElement).labels;
+  if (labels) {
+    for (const label of labels) {
       const text = label.textContent?.trim();
       if (text) return text;
     }
+  } else {
+    const id = inp.getAttribute('id');
+    const label = id ? document.querySelector(`label[for="${CSS.escape(id)}"]`) : null;
+    const text = label?.textContent?.trim();
+    if (text) return text;
   }
 
   const aria = inp.getAttribute('aria-label')?.trim();
@@ -474,11 +644,12 @@ export function getLabelForInput(inp: Element): string {
   // Try parent element for label text
   const parent = inp.closest('div, fieldset, li');
   if (parent) {
-    const labelEl = parent.querySelector('label, legend, span');
-    if (labelEl) {
-      const text = labelEl.textContent?.trim();
-      if (text) return text;
+    let text = ancestorLabels?.get(parent);
+    if (text === undefined) {
+      text = parent.querySelector('label, legend, span')?.textContent?.trim() || '';
+      ancestorLabels?.set(parent, text);
     }
+    if (text) return text;
   }
 
   return '';